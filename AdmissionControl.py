@@ -0,0 +1,204 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from MeasurementCalculator import CORNER_BORDER_PX, measure_card_image
+from QualityGate import REDUCED_FLAGS, read_image_info
+from Scheduler import available_cores
+
+# ---------- Constants ----------
+# Peak memory of decode + measure_card_image per source pixel: 3 bytes for the
+# decoded BGR frame plus ~9 for the warp and the full-size grey, blur,
+# threshold, label and Laplacian intermediates (measured on a 12 MP scan).
+BYTES_PER_PIXEL = 12
+DECODED_BYTES_PER_PIXEL = 3
+JOB_OVERHEAD_BYTES = 16 * 1024 * 1024
+
+
+# ---------- Sizing ----------
+def estimate_peak_bytes(width, height, factor=1, full_decode=False):
+    """
+    Peak memory to decode and measure an image at 1/factor size. With
+    full_decode the codec cannot reduce (anything but JPEG), so the
+    full-size frame is held while it is resized down.
+    """
+    pixels = (width // factor) * (height // factor)
+    needed = pixels * BYTES_PER_PIXEL + JOB_OVERHEAD_BYTES
+    if full_decode and factor > 1:
+        needed += width * height * DECODED_BYTES_PER_PIXEL
+    return needed
+
+
+def available_memory():
+    """
+    Bytes this process could still allocate: MemAvailable, capped by the
+    cgroup memory limit when one is set. None when neither is readable.
+    """
+    available = None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    for limit_file, usage_file in (("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+                                   ("/sys/fs/cgroup/memory/memory.limit_in_bytes",
+                                    "/sys/fs/cgroup/memory/memory.usage_in_bytes")):
+        try:
+            with open(limit_file) as f:
+                limit = f.read().strip()
+            with open(usage_file) as f:
+                usage = int(f.read())
+        except (OSError, ValueError):
+            continue
+        if limit.isdigit() and int(limit) < 1 << 60:
+            headroom = int(limit) - usage
+            available = headroom if available is None else min(available, headroom)
+        break
+    return available
+
+
+def default_budget(fraction=0.5):
+    """Half of the available memory, or 2 GB when it cannot be determined."""
+    available = available_memory()
+    return int(available * fraction) if available else 2 * 1024 ** 3
+
+
+# ---------- Admission ----------
+def plan_job(path, budget_bytes, oversize="downscale"):
+    """
+    Decides how an image will be admitted:
+
+      {"path", "size", "factor", "bytes", "exclusive"}
+
+    Images whose estimate fits the budget run as they are (factor 1).
+    Oversize images are decoded at the mildest reduction that fits
+    (oversize="downscale"), or keep full size but run with nothing else
+    in flight (oversize="exclusive", or when even 1/8 does not fit). Only
+    JPEGs decode straight to the reduced size; other formats are budgeted
+    for their full-size decode as well.
+    """
+    info = read_image_info(path)
+    if info is None:
+        # Unknown format: assume it is large enough to run on its own
+        return {"path": path, "size": None, "factor": 1, "bytes": budget_bytes, "exclusive": True}
+
+    size = info["size"]
+    width, height = size
+    needed = estimate_peak_bytes(width, height)
+    if needed <= budget_bytes:
+        return {"path": path, "size": size, "factor": 1, "bytes": needed, "exclusive": False}
+
+    if oversize == "downscale":
+        for factor, _ in REDUCED_FLAGS:
+            reduced = estimate_peak_bytes(width, height, factor, full_decode=not info["jpeg"])
+            if reduced <= budget_bytes:
+                return {"path": path, "size": size, "factor": factor, "bytes": reduced,
+                        "exclusive": False}
+    return {"path": path, "size": size, "factor": 1, "bytes": budget_bytes, "exclusive": True}
+
+
+def decode_for_job(job, data=None):
+    """
+    Decodes a planned job at its reduction factor (cheap for JPEG; resized
+    otherwise), from the file or from its already read bytes.
+    """
+    flag = cv2.IMREAD_COLOR if job["factor"] == 1 else dict(REDUCED_FLAGS)[job["factor"]]
+    image = cv2.imread(job["path"], flag) if data is None else cv2.imdecode(data, flag)
+    if job["factor"] == 1:
+        return image
+    if image is not None and job["size"] is not None:
+        expected = job["size"][0] // job["factor"]
+        if image.shape[1] > expected * 1.5:
+            # The codec ignored the reduction; shrink after the fact
+            image = cv2.resize(image, (expected, job["size"][1] // job["factor"]),
+                               interpolation=cv2.INTER_AREA)
+    return image
+
+
+def job_border_px(job):
+    """Corner patch size for measuring a job decoded at its reduction factor."""
+    return max(1, int(round(CORNER_BORDER_PX / job["factor"])))
+
+
+class MemoryBudget:
+    """
+    Blocking byte budget. acquire() waits until the request fits alongside
+    the jobs already admitted; an exclusive request waits until nothing else
+    holds the budget and then takes all of it.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget = budget_bytes
+        self.in_use = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes, exclusive=False):
+        nbytes = self.budget if exclusive else min(nbytes, self.budget)
+        with self._cond:
+            self._cond.wait_for(lambda: self.in_use + nbytes <= self.budget)
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+        return nbytes
+
+    def release(self, nbytes):
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+
+# ---------- Budgeted Measurement ----------
+def measure_files_budgeted(files, budget_bytes=None, workers=None, oversize="downscale",
+                           scan_step=5, color_tol=30):
+    """
+    Measures image files with up to `workers` threads while keeping the sum
+    of the admitted jobs' estimated peak memory under budget_bytes. Jobs are
+    admitted in input order, so a large image waits rather than being
+    overtaken indefinitely by small ones.
+
+    Returns (results, stats). Each result is {"path", "factor", "exclusive",
+    "measurement"} or has "error" instead of "measurement". factor > 1 means
+    the image was measured at reduced resolution.
+    """
+    budget = MemoryBudget(budget_bytes or default_budget())
+    workers = workers or available_cores()
+    jobs = [plan_job(path, budget.budget, oversize) for path in files]
+
+    def run(job):
+        result = {"path": job["path"], "factor": job["factor"], "exclusive": job["exclusive"]}
+        try:
+            image = decode_for_job(job)
+            if image is None:
+                raise ValueError(f"Could not read image at {job['path']}")
+            result["measurement"] = measure_card_image(image, scan_step=scan_step,
+                                                       color_tol=color_tol,
+                                                       border_px=job_border_px(job))
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    def admitted(job, held):
+        try:
+            return run(job)
+        finally:
+            budget.release(held)
+
+    # Admission happens on this thread, one job at a time in input order
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for job in jobs:
+            held = budget.acquire(job["bytes"], exclusive=job["exclusive"])
+            futures.append(pool.submit(admitted, job, held))
+        results = [f.result() for f in futures]
+
+    stats = {
+        "budget_bytes": budget.budget,
+        "peak_admitted_bytes": budget.peak,
+        "downscaled": sum(1 for j in jobs if j["factor"] > 1),
+        "exclusive": sum(1 for j in jobs if j["exclusive"]),
+    }
+    return results, stats
@@ -0,0 +1,148 @@
+import io
+import os
+import json
+import mmap
+import struct
+import threading
+
+from PIL import Image
+
+from paths import resource_path
+
+# ---------- Constants ----------
+BUNDLE_MAGIC = b"PGASSET1"
+DEFAULT_BUNDLE_PATH = "referenceAssets.bin"
+DEFAULT_ASSET_DIRS = ("referenceImages",)
+DISPLAY_MAX_SIDE = 900     # larger than any image box in the desktop app
+JPEG_QUALITY = 90
+
+# Layout: magic | uint32 index length | JSON index | image blobs.
+# The index maps "referenceImages/<file>" to offset/length/size of a
+# display-ready JPEG, offsets counted from the end of the index.
+_HEADER = struct.Struct("<8sI")
+
+
+# ---------- Build Step ----------
+def build_bundle(out_path=None, asset_dirs=DEFAULT_ASSET_DIRS, base_dir=".",
+                 max_side=DISPLAY_MAX_SIDE, quality=JPEG_QUALITY):
+    """
+    Packs every image under asset_dirs into one archive of pre-scaled JPEGs.
+    Run before packaging; the build then ships the bundle instead of the
+    loose folders. Returns the index.
+    """
+    out_path = out_path or os.path.join(base_dir, DEFAULT_BUNDLE_PATH)
+    blobs, index = [], {}
+    for folder in asset_dirs:
+        for name in sorted(os.listdir(os.path.join(base_dir, folder))):
+            if os.path.splitext(name)[1].lower() not in (".png", ".jpg", ".jpeg", ".bmp"):
+                continue
+            with Image.open(os.path.join(base_dir, folder, name)) as img:
+                img = img.convert("RGB")
+                img.thumbnail((max_side, max_side), Image.LANCZOS)
+                buf = io.BytesIO()
+                img.save(buf, format="JPEG", quality=quality, optimize=True)
+            key = f"{folder}/{name}"
+            index[key] = {"length": buf.tell(), "width": img.width, "height": img.height}
+            blobs.append((key, buf.getvalue()))
+
+    offset = 0
+    for key, blob in blobs:
+        index[key]["offset"] = offset
+        offset += len(blob)
+    encoded = json.dumps(index).encode()
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(BUNDLE_MAGIC, len(encoded)))
+        f.write(encoded)
+        for _, blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, out_path)
+    return index
+
+
+# ---------- Reading ----------
+class AssetBundle:
+    """Read-only, memory-mapped view of a bundle built by build_bundle()."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_len = _HEADER.unpack_from(self._map, 0)
+        if magic != BUNDLE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an asset bundle.")
+        self.index = json.loads(self._map[_HEADER.size:_HEADER.size + index_len])
+        self._data_start = _HEADER.size + index_len
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def names(self):
+        return list(self.index)
+
+    def read_bytes(self, key):
+        entry = self.index[key]
+        start = self._data_start + entry["offset"]
+        return memoryview(self._map)[start:start + entry["length"]]
+
+    def open_image(self, key):
+        """Decoded PIL image; only this entry's pages of the file are touched."""
+        img = Image.open(io.BytesIO(self.read_bytes(key)))
+        img.load()
+        return img
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+_default_bundle = None
+_default_bundle_checked = False
+_default_bundle_lock = threading.Lock()
+
+def get_default_bundle():
+    """The bundle shipped next to the app, or None in dev mode (loose files only)."""
+    global _default_bundle, _default_bundle_checked
+    with _default_bundle_lock:
+        if not _default_bundle_checked:
+            _default_bundle_checked = True
+            path = resource_path(DEFAULT_BUNDLE_PATH)
+            if os.path.exists(path):
+                try:
+                    _default_bundle = AssetBundle(path)
+                except (OSError, ValueError) as e:
+                    print(f"Ignoring asset bundle {path}: {e}")
+    return _default_bundle
+
+
+def asset_key(path):
+    """Bundle key for a resource path, e.g. ".../referenceImages/x.png" -> "referenceImages/x.png"."""
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(resource_path("")))
+    return rel.replace(os.sep, "/")
+
+
+def open_display_image(path, max_side=DISPLAY_MAX_SIDE):
+    """
+    PIL image for display. Bundled assets come pre-scaled from the bundle;
+    anything else (user scans, dev mode without a bundle) is opened from disk,
+    with JPEGs decoded at a reduced scale when they are far larger than
+    max_side.
+    """
+    bundle = get_default_bundle()
+    if bundle is not None:
+        key = asset_key(path)
+        if key in bundle:
+            return bundle.open_image(key)
+    img = Image.open(path)
+    img.draft("RGB", (max_side, max_side))   # no-op for formats without DCT scaling
+    return img
+
+
+if __name__ == "__main__":
+    index = build_bundle()
+    size = os.path.getsize(DEFAULT_BUNDLE_PATH)
+    loose = sum(os.path.getsize(os.path.join(*key.split("/"))) for key in index)
+    print(f"Packed {len(index)} images into {DEFAULT_BUNDLE_PATH}: "
+          f"{size / 1e6:.2f} MB (loose files {loose / 1e6:.2f} MB).")
@@ -0,0 +1,230 @@
+import os
+import time
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from MeasurementCalculator import measure_card_image, error_outcome, load_card_image
+from Metrics import SUCCESS
+from Scheduler import available_cores
+
+# ---------- Constants ----------
+BATCH_WINDOW_SECONDS = 0.005   # how long a prediction waits for others to join its batch
+MAX_BATCH = 64
+
+
+# ---------- Grader ----------
+class _LoopState:
+    """asyncio objects of one event loop; they cannot be shared across loops."""
+
+    def __init__(self, max_concurrency):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.pending = []       # [(measurement, future)] waiting for the next batch
+        self.flush_handle = None
+        self.tasks = set()      # running batch predictions, kept referenced until done
+
+
+class AsyncGrader:
+    """
+    Grading for asyncio code. Decoding and measuring run on a thread pool
+    (OpenCV releases the GIL), at most max_concurrency at a time; the event
+    loop only awaits. Predictions requested within batch_window seconds of
+    each other are coalesced into one predict_card_grades call.
+
+    Cancelling or timing out a grade stops waiting for it at once, but a
+    measurement already running in a thread finishes in the background
+    (threads cannot be interrupted); the thread pool size still bounds how
+    much such work can pile up.
+
+    One grader can be used from several event loops in turn (e.g. repeated
+    asyncio.run calls); its semaphore and batching state are kept per loop.
+    """
+
+    def __init__(self, max_concurrency=None, executor=None, batch_window=BATCH_WINDOW_SECONDS,
+                 max_batch=MAX_BATCH, scan_step=1, color_tol=20, metrics=None):
+        self.max_concurrency = max_concurrency or available_cores()
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                        thread_name_prefix="async-grader")
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.scan_step = scan_step
+        self.color_tol = color_tol
+        self.metrics = metrics
+        self._loops = weakref.WeakKeyDictionary()   # event loop -> _LoopState
+        self.batches = 0          # predict calls made, for checking how well batching works
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState(self.max_concurrency)
+        return state
+
+    def close(self):
+        if self._own_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Measurement ---
+    def _measure_sync(self, source):
+        return measure_card_image(load_card_image(source), scan_step=self.scan_step,
+                                  color_tol=self.color_tol, metrics=self.metrics)
+
+    async def measure(self, source):
+        """Measurement dict for anything load_card_image accepts (path, bytes, array)."""
+        async with self._state().semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._measure_sync, source)
+
+    # --- Batched prediction ---
+    async def predict(self, measurement):
+        """predict_card_grades result for one measurement, batched with concurrent calls."""
+        loop = asyncio.get_running_loop()
+        state = self._state()
+        future = loop.create_future()
+        state.pending.append((measurement, future))
+        if len(state.pending) >= self.max_batch:
+            self._flush(state)
+        elif state.flush_handle is None:
+            state.flush_handle = loop.call_later(self.batch_window, self._flush, state)
+        return await future
+
+    def _flush(self, state):
+        if state.flush_handle is not None:
+            state.flush_handle.cancel()
+            state.flush_handle = None
+        batch = [(m, f) for m, f in state.pending if not f.cancelled()]
+        state.pending = []
+        if batch:
+            # The loop only keeps weak references to tasks
+            task = asyncio.ensure_future(self._predict_batch(batch))
+            state.tasks.add(task)
+            task.add_done_callback(state.tasks.discard)
+
+    async def _predict_batch(self, batch):
+        from Scikit_Learn_Model import predict_card_grades   # loads the model on first use
+        loop = asyncio.get_running_loop()
+        self.batches += 1
+        try:
+            results = await loop.run_in_executor(self._executor, predict_card_grades,
+                                                 [m for m, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            result = {key: float(value) for key, value in result.items()}   # not NumPy scalars
+            if not future.done():
+                future.set_result(result)
+
+    # --- Grading ---
+    async def _grade(self, source):
+        start = time.perf_counter()
+        label = source if isinstance(source, (str, os.PathLike)) else "<memory>"
+        try:
+            result = await self.predict(await self.measure(source))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.record(label, error_outcome(e), error=str(e),
+                                    seconds=time.perf_counter() - start)
+            raise
+        if self.metrics is not None:
+            self.metrics.record(label, SUCCESS, seconds=time.perf_counter() - start)
+        return result
+
+    async def grade(self, source, timeout=None):
+        """
+        Grades one card: {"surface", "corners", "centering_h", "centering_v",
+        "predicted_grade"}. Raises asyncio.TimeoutError after timeout seconds.
+        """
+        if timeout is None:
+            return await self._grade(source)
+        return await asyncio.wait_for(self._grade(source), timeout)
+
+    async def grade_many(self, sources, timeout=None, return_exceptions=True):
+        """
+        Async generator of (index, result) in completion order. Only a
+        bounded window of grades is in flight, so sources may be a long or
+        lazy iterable. With return_exceptions, a failed or timed-out card
+        yields its exception as the result instead of ending the stream.
+        Leaving the loop early cancels the grades still in flight.
+        """
+        window = self.max_concurrency * 2
+        sources = iter(enumerate(sources))
+        in_flight = set()
+
+        async def indexed(idx, source):
+            try:
+                return idx, await self.grade(source, timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return idx, e
+
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < window:
+                    item = next(sources, None)
+                    if item is None:
+                        exhausted = True
+                    else:
+                        in_flight.add(asyncio.ensure_future(indexed(*item)))
+                if not in_flight:
+                    return
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+
+# ---------- Module-level API ----------
+_default_grader = None
+
+def _grader():
+    global _default_grader
+    if _default_grader is None:
+        _default_grader = AsyncGrader()
+    return _default_grader
+
+async def grade(source, timeout=None):
+    """await grade(path_or_bytes) with a shared default AsyncGrader."""
+    return await _grader().grade(source, timeout)
+
+async def grade_many(sources, timeout=None, return_exceptions=True):
+    """async for index, result in grade_many(sources), with the default AsyncGrader."""
+    async for item in _grader().grade_many(sources, timeout, return_exceptions):
+        yield item
+
+
+if __name__ == "__main__":
+    import sys
+    from MeasurementCalculator import collect_image_files
+
+    async def main(folder):
+        files = collect_image_files(os.path.abspath(folder))
+        start = time.perf_counter()
+        async with AsyncGrader() as grader:
+            async for idx, result in grader.grade_many(files):
+                name = os.path.basename(files[idx])
+                if isinstance(result, Exception):
+                    print(f"{name}: failed ({result})")
+                else:
+                    print(f"{name}: PSA {result['predicted_grade']}")
+            print(f"{len(files)} cards in {time.perf_counter() - start:.2f}s, "
+                  f"{grader.batches} prediction batch(es)")
+
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "referenceImages"))
@@ -0,0 +1,281 @@
+import os
+import csv
+import time
+import queue
+import threading
+import traceback
+import cv2
+import numpy as np
+
+from MeasurementCalculator import (CORNER_BORDER_PX, CSV_HEADER, collect_image_files,
+                                   measure_card_image, measurement_row, error_outcome)
+from Metrics import GradingMetrics, print_event, SUCCESS, UNREADABLE
+from Scheduler import available_cores
+from AdmissionControl import MemoryBudget, plan_job, decode_for_job, job_border_px
+
+_DONE = object()  # end-of-stream marker passed between stages
+
+
+# ---------- Stage Accounting ----------
+class StageStats:
+    """Busy time per stage; utilisation = busy / (wall time x thread count)."""
+
+    def __init__(self, name, threads):
+        self.name = name
+        self.threads = threads
+        self.busy = 0.0
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.busy += seconds
+            self.items += 1
+
+    def summary(self, wall):
+        capacity = wall * self.threads
+        return {
+            "threads": self.threads,
+            "items": self.items,
+            "busy_seconds": round(self.busy, 3),
+            "utilisation": round(self.busy / capacity, 3) if capacity > 0 else 0.0,
+        }
+
+
+# ---------- Pipeline ----------
+class GradingPipeline:
+    """
+    Three overlapped stages joined by bounded queues:
+
+      decode  (decode_threads)  - read file bytes and cv2.imdecode
+      measure (measure_threads) - measure_card_image
+      output  (1 thread)        - reorder by input index and hand rows to a sink
+
+    Decoding and most OpenCV calls release the GIL, so threads are enough to
+    keep the disk and the CPU busy at the same time. The queue depths bound
+    how many decoded images can be held in memory at once.
+
+    OpenCV's own thread pool is shrunk for the run so that measure threads
+    times OpenCV threads does not exceed the available cores.
+
+    With memory_budget (bytes), each image is admitted by AdmissionControl
+    before it is decoded: decode threads wait until its estimated peak memory
+    fits next to the images still in flight, and oversize images are decoded
+    at reduced size (oversize="downscale") or run alone ("exclusive").
+
+    With a GradingMetrics, stage latencies are recorded as they happen and
+    each image's outcome is recorded by the output stage, in input order.
+    """
+
+    def __init__(self, decode_threads=2, measure_threads=None, decode_queue_depth=8,
+                 output_queue_depth=32, scan_step=5, color_tol=30, metrics=None,
+                 memory_budget=None, oversize="downscale"):
+        self.decode_threads = decode_threads
+        self.measure_threads = measure_threads or max(1, available_cores() - decode_threads)
+        self.decode_queue_depth = decode_queue_depth
+        self.output_queue_depth = output_queue_depth
+        self.scan_step = scan_step
+        self.color_tol = color_tol
+        self.metrics = metrics
+        self.memory_budget = memory_budget
+        self.oversize = oversize
+
+    def run(self, files, sink):
+        """
+        Measures every file and calls sink(index, path, measurement, error) in
+        input order; exactly one of measurement/error is None. Returns stage stats.
+        """
+        paths_q = queue.Queue()
+        decoded_q = queue.Queue(maxsize=self.decode_queue_depth)
+        budget = MemoryBudget(self.memory_budget) if self.memory_budget else None
+        results_q = queue.Queue(maxsize=self.output_queue_depth)
+
+        decode_stats = StageStats("decode", self.decode_threads)
+        measure_stats = StageStats("measure", self.measure_threads)
+        output_stats = StageStats("output", 1)
+
+        for item in enumerate(files):
+            paths_q.put(item)
+        for _ in range(self.decode_threads):
+            paths_q.put(_DONE)
+
+        def decode_worker():
+            while True:
+                item = paths_q.get()
+                if item is _DONE:
+                    return
+                idx, path = item
+                held = 0
+                border_px = CORNER_BORDER_PX
+                if budget is not None:
+                    job = plan_job(path, budget.budget, self.oversize)
+                    held = budget.acquire(job["bytes"], exclusive=job["exclusive"])
+                    border_px = job_border_px(job)
+                start = time.perf_counter()
+                try:
+                    data = np.fromfile(path, dtype=np.uint8)
+                    if budget is not None:
+                        image = decode_for_job(job, data)
+                    else:
+                        image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+                    error = None if image is not None else "unreadable"
+                except Exception as e:
+                    image, error = None, str(e)
+                seconds = time.perf_counter() - start
+                decode_stats.record(seconds)
+                if self.metrics is not None:
+                    self.metrics.observe("decode", seconds)
+                decoded_q.put((idx, path, image, error, seconds, held, border_px))
+
+        def measure_worker():
+            while True:
+                item = decoded_q.get()
+                if item is _DONE:
+                    results_q.put(_DONE)
+                    return
+                idx, path, image, error, seconds, held, border_px = item
+                measurement = None
+                outcome = SUCCESS if error is None else UNREADABLE
+                trace = None
+                if error is None:
+                    start = time.perf_counter()
+                    try:
+                        measurement = measure_card_image(image, scan_step=self.scan_step,
+                                                         color_tol=self.color_tol,
+                                                         metrics=self.metrics,
+                                                         border_px=border_px)
+                    except Exception as e:
+                        error = str(e)
+                        outcome = error_outcome(e)
+                        trace = traceback.format_exc()
+                    measure_stats.record(time.perf_counter() - start)
+                    seconds += time.perf_counter() - start
+                del image
+                if held:
+                    budget.release(held)
+                results_q.put((idx, path, measurement, error, outcome, seconds, trace))
+
+        cv_threads = cv2.getNumThreads()
+        cv2.setNumThreads(max(1, available_cores() // self.measure_threads))
+
+        wall_start = time.perf_counter()
+        decoders = [threading.Thread(target=decode_worker, daemon=True)
+                    for _ in range(self.decode_threads)]
+        for t in decoders:
+            t.start()
+
+        # Once every decoder has drained, tell each measure worker to stop
+        def close_decoded():
+            for t in decoders:
+                t.join()
+            for _ in range(self.measure_threads):
+                decoded_q.put(_DONE)
+
+        measurers = [threading.Thread(target=measure_worker, daemon=True)
+                     for _ in range(self.measure_threads)]
+        for t in measurers:
+            t.start()
+        threading.Thread(target=close_decoded, daemon=True).start()
+
+        # Output stage runs on the calling thread: emit strictly in input order
+        pending = {}
+        next_idx = 0
+        finished = 0
+        while finished < self.measure_threads:
+            item = results_q.get()
+            if item is _DONE:
+                finished += 1
+                continue
+            pending[item[0]] = item
+            while next_idx in pending:
+                start = time.perf_counter()
+                idx, path, measurement, error, outcome, seconds, trace = pending.pop(next_idx)
+                if self.metrics is not None:
+                    self.metrics.record(path, outcome, error=error, seconds=seconds,
+                                        traceback=trace)
+                sink(idx, path, measurement, error)
+                output_stats.record(time.perf_counter() - start)
+                next_idx += 1
+
+        wall = time.perf_counter() - wall_start
+        cv2.setNumThreads(cv_threads)
+        return {
+            "wall_seconds": round(wall, 3),
+            "images_per_second": round(len(files) / wall, 2) if wall > 0 else 0.0,
+            "stages": {s.name: s.summary(wall) for s in (decode_stats, measure_stats, output_stats)},
+        }
+
+
+# ---------- Batch Entry Point ----------
+def imgFolderToTxtFilePipelined(folder_path,
+                                output_csv_path,
+                                supported_exts=(".jpg", ".jpeg", ".png", ".bmp"),
+                                scan_step=5,
+                                color_tol=30,
+                                decode_threads=2,
+                                measure_threads=None,
+                                decode_queue_depth=8,
+                                output_queue_depth=32,
+                                metrics=None,
+                                metrics_path=None,
+                                store=None,
+                                memory_budget=None,
+                                oversize="downscale"):
+    """
+    Same CSV output as imgFolderToTxtFile (rows in sorted filename order), with
+    decode, measurement and writing overlapped. Prints per-stage utilisation
+    and returns (rows written, stats). Outcomes are reported through metrics
+    exactly as in imgFolderToTxtFile, including the optional JSON summary and
+    ResultsStore.
+    """
+    if metrics is None:
+        metrics = GradingMetrics(run_name=os.path.basename(os.path.abspath(folder_path)),
+                                 hooks=[print_event])
+    folder_path = os.path.abspath(folder_path)
+    output_csv_path = os.path.abspath(output_csv_path)
+
+    files = collect_image_files(folder_path, supported_exts)
+    if not files:
+        print(f"No images found in {folder_path}.")
+        return 0, None
+
+    os.makedirs(os.path.dirname(output_csv_path), exist_ok=True)
+    write_header = not os.path.exists(output_csv_path)
+
+    pipeline = GradingPipeline(decode_threads=decode_threads,
+                               measure_threads=measure_threads,
+                               decode_queue_depth=decode_queue_depth,
+                               output_queue_depth=output_queue_depth,
+                               scan_step=scan_step,
+                               color_tol=color_tol,
+                               metrics=metrics,
+                               memory_budget=memory_budget,
+                               oversize=oversize)
+    processed = 0
+    stored = []
+
+    with open(output_csv_path, "a", newline="", encoding="utf-8") as fout:
+        writer = csv.writer(fout)
+        if write_header:
+            writer.writerow(CSV_HEADER)
+
+        def sink(idx, path, measurement, error):
+            nonlocal processed
+            if error is None:
+                writer.writerow(measurement_row(os.path.basename(path), measurement))
+                processed += 1
+                if store is not None:
+                    stored.append((path, measurement))
+
+        stats = pipeline.run(files, sink)
+
+    for name, stage in stats["stages"].items():
+        print(f"{name:>8}: {stage['threads']} thread(s), {stage['items']} items, "
+              f"{stage['utilisation'] * 100:.0f}% busy")
+    if metrics_path:
+        metrics.write_summary(metrics_path)
+    if store is not None:
+        store.add_measurements(stored, run=metrics.run_name)
+    print(f"Completed. {processed} images written to CSV "
+          f"({stats['images_per_second']} images/s).")
+    return processed, stats
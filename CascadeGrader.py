@@ -0,0 +1,176 @@
+import os
+import time
+import cv2
+
+from MeasurementCalculator import (CORNER_BORDER_PX, UnreadableImageError, CardNotDetectedError,
+                                   detect_card_contour, four_point_transform, measure_warped_card,
+                                   collect_image_files)
+from QualityGate import read_image_size
+from Scikit_Learn_Model import get_model, predict_grades_with_spread
+
+# ---------- Constants ----------
+# JPEGs decode straight to 1/2 size. At 1/4 the surface score, which has no
+# pixel constant to scale, drifts too far from its full-resolution value.
+LOW_RES_FLAG = cv2.IMREAD_REDUCED_COLOR_2
+REDUCTION = {
+    cv2.IMREAD_COLOR: 1,
+    cv2.IMREAD_REDUCED_COLOR_2: 2,
+    cv2.IMREAD_REDUCED_COLOR_4: 4,
+    cv2.IMREAD_REDUCED_COLOR_8: 8,
+}
+# Low-res warps with a shorter side than this lose too much detail to be
+# graded; their cards always go to pass 2, straight away when the image
+# header already shows the reduced decode would be smaller.
+MIN_LOW_RES_WARP_PX = 1000
+
+
+def boundary_distance(grade):
+    """Distance from a predicted grade to the nearest PSA rounding boundary (x.5)."""
+    return abs((grade % 1.0) - 0.5)
+
+
+def _measure(path, flag, scan_step, color_tol, min_warp_px=0):
+    """
+    Measures one image decoded with flag. Pixel constants are scaled by the
+    flag's reduction, so a reduced decode is scored like the full image.
+    Returns None when the warp's shorter side is below min_warp_px.
+    """
+    image = cv2.imread(path, flag)
+    if image is None:
+        raise UnreadableImageError(f"Could not read image at {path}")
+    card_contour = detect_card_contour(image, scan_step=scan_step, color_tol=color_tol)
+    if card_contour is None:
+        raise CardNotDetectedError("Card contour not detected.")
+    warped = four_point_transform(image, card_contour)
+    if min(warped.shape[:2]) < min_warp_px:
+        return None
+    border_px = max(1, int(round(CORNER_BORDER_PX / REDUCTION[flag])))
+    return measure_warped_card(warped, border_px=border_px)
+
+
+# ---------- Cascade ----------
+def grade_cascade(paths,
+                  spread_threshold=1.0,
+                  boundary_margin=0.15,
+                  low_res_flag=LOW_RES_FLAG,
+                  min_warp_px=MIN_LOW_RES_WARP_PX,
+                  scan_step=5,
+                  color_tol=30):
+    """
+    Two-pass grading.
+
+    Pass 1 decodes every image at reduced resolution, measures the downscaled
+    warp (corner size scaled to match) and predicts all cards in one batch,
+    keeping the spread of the per-tree predictions. A card escalates to pass 2
+    (full-resolution decode and measurement) when its low-res warp is smaller
+    than min_warp_px, the trees disagree by more than spread_threshold, or
+    the grade lies within boundary_margin of a PSA rounding boundary. Images
+    whose header shows the reduced decode would be smaller than min_warp_px
+    skip pass 1 and are only measured at full resolution.
+
+    Returns (results, report). Each result carries "escalated"; failed images
+    carry "error" instead of scores. The report's timings leave out loading
+    the model, which is reported as model_load_seconds.
+    """
+    load_start = time.perf_counter()
+    get_model()
+    model_load_seconds = time.perf_counter() - load_start
+
+    start = time.perf_counter()
+    results = [{"path": p} for p in paths]
+
+    low_ok = []
+    low_measurements = []
+    low_card_seconds = {}
+    escalate = []
+    skipped = 0
+    for i, path in enumerate(paths):
+        size = read_image_size(path)
+        if size is not None and min(size) // REDUCTION[low_res_flag] < min_warp_px:
+            escalate.append(i)   # no warp of this image can be large enough
+            skipped += 1
+            continue
+        card_start = time.perf_counter()
+        try:
+            m = _measure(path, low_res_flag, scan_step, color_tol, min_warp_px)
+        except Exception as e:
+            results[i]["error"] = str(e)
+            continue
+        finally:
+            low_card_seconds[i] = time.perf_counter() - card_start
+        if m is None:
+            escalate.append(i)   # too small to grade at low resolution
+        else:
+            low_measurements.append(m)
+            low_ok.append(i)
+    low_seconds = time.perf_counter() - start
+
+    if low_measurements:
+        grades, spreads = predict_grades_with_spread(low_measurements)
+        for i, m, g, s in zip(low_ok, low_measurements, grades, spreads):
+            results[i].update(m)
+            results[i].update({"predicted_grade": round(float(g), 1),
+                               "spread": round(float(s), 2),
+                               "escalated": False})
+            if s > spread_threshold or boundary_distance(g) < boundary_margin:
+                escalate.append(i)
+
+    escalate.sort()
+    full_start = time.perf_counter()
+    full_ok = []
+    full_measurements = []
+    for i in escalate:
+        try:
+            full_measurements.append(_measure(paths[i], cv2.IMREAD_COLOR, scan_step, color_tol))
+            full_ok.append(i)
+        except Exception as e:
+            if "predicted_grade" in results[i]:
+                results[i]["full_res_error"] = str(e)  # keep the pass-1 grade
+            else:
+                results[i]["error"] = str(e)
+    full_seconds = time.perf_counter() - full_start
+
+    if full_measurements:
+        grades, spreads = predict_grades_with_spread(full_measurements)
+        for i, m, g, s in zip(full_ok, full_measurements, grades, spreads):
+            results[i].update(m)
+            results[i].update({"predicted_grade": round(float(g), 1),
+                               "spread": round(float(s), 2),
+                               "escalated": True})
+
+    total = time.perf_counter() - start
+    # Full-resolution cost: measured for the cards that escalated, estimated
+    # for the rest from their pass-1 time scaled by the number of pixels
+    escalated = set(escalate)
+    est_full_only = full_seconds + sum(t * REDUCTION[low_res_flag] ** 2
+                                       for i, t in low_card_seconds.items() if i not in escalated)
+    report = {
+        "cards": len(paths),
+        "escalated": len(escalate),
+        "escalation_rate": round(len(escalate) / len(paths), 3) if paths else 0.0,
+        "skipped_low_res": skipped,
+        "low_res_seconds": round(low_seconds, 3),
+        "full_res_seconds": round(full_seconds, 3),
+        "total_seconds": round(total, 3),
+        "model_load_seconds": round(model_load_seconds, 3),
+        "estimated_full_res_only_seconds": round(est_full_only, 3),
+        "throughput_gain": round(est_full_only / total, 2) if total > 0 else 1.0,
+    }
+    return results, report
+
+
+def grade_folder_cascade(folder_path, **kwargs):
+    """grade_cascade over every image in a folder; prints the escalation report."""
+    files = collect_image_files(os.path.abspath(folder_path))
+    results, report = grade_cascade(files, **kwargs)
+    print(f"Cascade: {report['escalated']}/{report['cards']} cards escalated to full resolution "
+          f"in {report['total_seconds']}s, ~{report['throughput_gain']}x vs full resolution only "
+          f"(model load {report['model_load_seconds']}s).")
+    return results, report
+
+
+if __name__ == "__main__":
+    import sys
+    for r in grade_folder_cascade(sys.argv[1])[0]:
+        print(os.path.basename(r["path"]), r.get("predicted_grade", r.get("error")),
+              "(escalated)" if r.get("escalated") else "")
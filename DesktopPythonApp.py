@@ -1,17 +1,19 @@
+import time
+_LAUNCH_TIME = time.perf_counter()
+
 import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog
 from PIL import Image, ImageTk
-from MeasurementCalculator import process_single_card
-
-import pickle
-from Scikit_Learn_Model import predict_card_grade
+from Metrics import GradingMetrics, print_event, SUCCESS
 from paths import resource_path
+from AssetBundle import open_display_image
 
-# ---------- Load Trained Model Pickle File ----------
-model_path = resource_path("trained_model.pkl")
-with open(model_path, "rb") as f:
-    model = pickle.load(f)
+# OpenCV, NumPy and scikit-learn (pulled in by the model pickle) take over a
+# second to import, so they are only imported inside the functions that need
+# them; warm_up_backend() loads them in the background once the window is up.
 
 # ---------- Reusable Rectangular Button ----------
 def rect_button(parent, text, command=None, width=140, height=40,
@@ -56,6 +58,75 @@ def rect_button(parent, text, command=None, width=140, height=40,
     return c
 
 
+# ---------- Background Warm-up ----------
+_reference_library = None
+_reference_library_loaded = False
+_reference_library_lock = threading.Lock()
+
+def get_reference_library():
+    """The bundled reference library (or None), loaded on first use."""
+    global _reference_library, _reference_library_loaded
+    with _reference_library_lock:
+        if not _reference_library_loaded:
+            from ReferenceLibrary import load_default_library
+            _reference_library = load_default_library()
+            _reference_library_loaded = True
+    return _reference_library
+
+def warm_up_backend():
+    """
+    Imports the measurement pipeline and loads the model and reference
+    library, so the first Submit does not pay for them. Safe to run off the
+    UI thread: it never touches Tk, and a Submit that arrives early simply
+    waits on the same import/load locks.
+    """
+    import MeasurementCalculator  # OpenCV, NumPy
+    from Scikit_Learn_Model import get_model
+    get_model()
+    get_reference_library()
+
+
+# ---------- Similar Card Lookup ----------
+
+def similar_charizard_path(predicted_grade):
+    """Fallback when no reference library is available: closest bundled Charizard grade."""
+    if predicted_grade >= 9.5:
+        img_name = "10.0PSA_Charizard.png"
+    elif predicted_grade >= 8.5:
+        img_name = "9.0PSA_Charizard.png"
+    elif predicted_grade >= 7.5:
+        img_name = "8.0PSA_Charizard.png"
+    elif predicted_grade >= 6.5:
+        img_name = "7.0PSA_Charizard.png"
+    elif predicted_grade >= 5.5:
+        img_name = "6.0PSA_Charizard.png"
+    elif predicted_grade >= 4.5:
+        img_name = "5.0PSA_Charizard.png"
+    elif predicted_grade >= 3.5:
+        img_name = "4.0PSA_Charizard.png"
+    elif predicted_grade >= 2.5:
+        img_name = "3.0PSA_Charizard.png"
+    elif predicted_grade >= 1.5:
+        img_name = "2.0PSA_Charizard.png"
+    else:
+        img_name = "1.0PSA_Charizard.png"
+    return resource_path(os.path.join("referenceImages", img_name))
+
+def find_similar_card_path(predicted_grade, measurements, k=5):
+    """
+    Picks the reference scan nearest to the measurements, preferring the one whose
+    grade is closest to the prediction. Falls back to the bundled Charizard images.
+    """
+    reference_library = get_reference_library()
+    if reference_library is not None:
+        matches = [m for m in reference_library.query(measurements, k=k)
+                   if os.path.exists(m["path"])]
+        if matches:
+            best = min(matches, key=lambda m: abs(m["grade"] - predicted_grade))
+            return best["path"]
+    return similar_charizard_path(predicted_grade)
+
+
 # ---------- Main Application ----------
 class AIPokemonGraderApp(tk.Tk):
     def __init__(self):
@@ -65,21 +136,44 @@ class AIPokemonGraderApp(tk.Tk):
         self.configure(bg="#212b31")
 
         self.latest_prediction = None
+        # Same outcome/latency accounting as the batch path
+        self.metrics = GradingMetrics(run_name="desktop", hooks=[print_event])
+        self._results_store = None
+        self.time_to_first_frame = None
         self.container = tk.Frame(self, bg="#212b31")
         self.container.pack(fill="both", expand=True)
 
+        # Pages are built the first time they are shown
         self.pages = {}
-        # add ResultsPage to the list so it is available for navigation
-        for PageClass in (MainPage, SettingsPage, HowItWorksPage, ResultsPage):
-            page = PageClass(parent=self.container, controller=self)
-            self.pages[PageClass] = page
-            page.place(relwidth=1, relheight=1)
-
         self.show_page(MainPage)
+        self.bind("<Map>", self._on_first_map)
 
     def show_page(self, page_class):
-        page = self.pages[page_class]
+        page = self.pages.get(page_class)
+        if page is None:
+            page = page_class(parent=self.container, controller=self)
+            self.pages[page_class] = page
+            page.place(relwidth=1, relheight=1)
         page.tkraise()
+        return page
+
+    @property
+    def results_store(self):
+        if self._results_store is None:
+            from ResultsStore import ResultsStore
+            self._results_store = ResultsStore()
+        return self._results_store
+
+    def _on_first_map(self, event):
+        if event.widget is not self or self.time_to_first_frame is not None:
+            return
+        self.unbind("<Map>")
+        # Report once the first frame has actually been drawn
+        self.update_idletasks()
+        self.time_to_first_frame = time.perf_counter() - _LAUNCH_TIME
+        self.metrics.observe("time_to_first_frame", self.time_to_first_frame)
+        print(f"Time to first frame: {self.time_to_first_frame:.3f}s")
+        threading.Thread(target=warm_up_backend, daemon=True).start()
 
 
 # ---------- MAIN PAGE ----------
@@ -141,10 +235,17 @@ class MainPage(tk.Frame):
 
             print("Selected file:", file_path)
 
+            from MeasurementCalculator import process_single_card, error_outcome
+            from Scikit_Learn_Model import predict_card_grade
+
             # Step 1: Run measurement calculator
-            measurement_data = process_single_card(file_path)
-            if measurement_data is None:
-                print("Error: MeasurementCalculator returned None")
+            metrics = controller.metrics
+            start = time.perf_counter()
+            try:
+                measurement_data = process_single_card(file_path, metrics=metrics)
+            except Exception as e:
+                metrics.record(file_path, error_outcome(e), error=str(e),
+                               seconds=time.perf_counter() - start)
                 return
 
             surface = measurement_data.get("surface", 0)
@@ -153,32 +254,15 @@ class MainPage(tk.Frame):
             centering_v = measurement_data.get("centering_v", 0)
 
             # Step 2: Predict grade
+            predict_start = time.perf_counter()
             prediction = predict_card_grade(surface, corners, centering_h, centering_v)
             predicted_grade = prediction["predicted_grade"]
+            metrics.observe("predict", time.perf_counter() - predict_start)
+            metrics.record(file_path, SUCCESS, seconds=time.perf_counter() - start)
 
             # Step 3: Determine similarly graded card
-            if predicted_grade >= 9.5:
-                img_name = "10.0PSA_Charizard.png"
-            elif predicted_grade >= 8.5:
-                img_name = "9.0PSA_Charizard.png"
-            elif predicted_grade >= 7.5:
-                img_name = "8.0PSA_Charizard.png"
-            elif predicted_grade >= 6.5:
-                img_name = "7.0PSA_Charizard.png"
-            elif predicted_grade >= 5.5:
-                img_name = "6.0PSA_Charizard.png"
-            elif predicted_grade >= 4.5:
-                img_name = "5.0PSA_Charizard.png"
-            elif predicted_grade >= 3.5:
-                img_name = "4.0PSA_Charizard.png"
-            elif predicted_grade >= 2.5:
-                img_name = "3.0PSA_Charizard.png"
-            elif predicted_grade >= 1.5:
-                img_name = "2.0PSA_Charizard.png"
-            else:
-                img_name = "1.0PSA_Charizard.png"
-
-            similar_card_path = resource_path(os.path.join("referenceImages", img_name))
+            similar_card_path = find_similar_card_path(
+                predicted_grade, (surface, corners, centering_h, centering_v))
 
             # Step 4: Package results for UI
             user_data = {
@@ -191,9 +275,10 @@ class MainPage(tk.Frame):
             }
 
 
+            controller.results_store.add(dict(user_data, path=file_path, source="desktop"))
+
             # Step 5: Navigate to results page & update view
-            controller.show_page(ResultsPage)
-            results_page = controller.pages[ResultsPage]
+            results_page = controller.show_page(ResultsPage)
             results_page.show_submitted_file(file_path)
             results_page.update_results(user_data)
 
@@ -239,7 +324,13 @@ class MainPage(tk.Frame):
         howitworks_btn = rect_button(bottom_frame, "How it works",
                                      command=lambda: controller.show_page(HowItWorksPage),
                                      width=180, height=48)
-        howitworks_btn.pack(side="left")
+        howitworks_btn.pack(side="left", padx=(0, 12))
+
+        # Batch grading button
+        batch_btn = rect_button(bottom_frame, "Batch Grade Folder",
+                                command=lambda: controller.show_page(BatchPage),
+                                width=180, height=48)
+        batch_btn.pack(side="left")
 
         # Footer
         footer = tk.Label(outer_frame, text="© 2025 Logan Edwards", font=("Segoe UI", 9),
@@ -343,7 +434,7 @@ class SettingsPage(tk.Frame):
             try:
                 img_path = resource_path(os.path.join("referenceImages", "DarkBackgroundReferenceImage.jpg"))
 
-                pil_img = Image.open(img_path)
+                pil_img = open_display_image(img_path)
 
                 # Now the box has *real* size values
                 left_box.update_idletasks()
@@ -704,7 +795,7 @@ class ResultsPage(tk.Frame):
             if self.submitted_image_label:
                 self.submitted_image_label.destroy()
 
-            img = Image.open(file_path)
+            img = open_display_image(file_path)
 
             self.left_box.update_idletasks()
             box_w = self.left_box.winfo_width()
@@ -792,7 +883,7 @@ class ResultsPage(tk.Frame):
         # Similar card preview
         if similar_path:
             try:
-                img = Image.open(similar_path)
+                img = open_display_image(similar_path)
 
                 # Resize to fit the box while maintaining aspect ratio
                 self.right_box.update_idletasks()
@@ -819,6 +910,370 @@ class ResultsPage(tk.Frame):
 
 
 
+# ---------- BATCH PAGE ----------
+# (heading, result key, relative column width)
+BATCH_COLUMNS = (
+    ("File", "filename", 0.36),
+    ("Grade", "grade", 0.12),
+    ("Surface", "surface", 0.13),
+    ("Corners", "corners", 0.13),
+    ("Centering H", "centering_h", 0.13),
+    ("Centering V", "centering_v", 0.13),
+)
+BATCH_ROW_HEIGHT = 28
+BATCH_PREDICT_CHUNK = 32   # measurements per batched model call
+
+
+class BatchPage(tk.Frame):
+    """
+    Grades every image in a folder on a background thread. The worker only
+    talks to the UI through a queue that is drained with after(), so Tk is
+    never touched off the main thread.
+
+    The results grid is virtualized: it owns one row of labels per visible
+    line and repaints them from self.results as the view scrolls, so the
+    widget count does not grow with the number of results.
+    """
+
+    def __init__(self, parent, controller):
+        super().__init__(parent, bg="#212b31")
+        self.controller = controller
+
+        self.results = []          # one dict per graded file, in display order
+        self.sort_key = None
+        self.sort_descending = False
+        self.offset = 0            # index of the first visible result
+        self.row_widgets = []      # (row frame, [cell labels]) pool
+        self.events = queue.Queue()
+        self.worker = None
+        self.total = 0
+        self.done = 0
+        self.started = None
+
+        outer_frame = tk.Frame(self, bg="#212b31")
+        outer_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # Title bar + back button
+        title_bar = tk.Frame(outer_frame, bg="#212b31")
+        title_bar.pack(fill="x", pady=(5, 10))
+
+        title_label = tk.Label(
+            title_bar,
+            text="Batch Grading",
+            font=("Segoe UI", 20, "bold"),
+            bg="#212b31",
+            fg="#cad2c5"
+        )
+        title_label.pack(pady=5)
+
+        back_btn = rect_button(
+            title_bar,
+            "← Back",
+            command=lambda: controller.show_page(MainPage),
+            width=100, height=36
+        )
+        back_btn.pack(side="left", padx=20, pady=5)
+
+        inner_frame = tk.Frame(outer_frame, bg="#353F47")
+        inner_frame.pack(fill="both", expand=True, padx=20, pady=10)
+
+        # ==== Folder selection + progress ====
+        controls = tk.Frame(inner_frame, bg="#353F47")
+        controls.pack(fill="x", padx=30, pady=(15, 5))
+
+        self.choose_btn = rect_button(controls, "Choose Folder", command=self.choose_folder,
+                                      width=150, height=36)
+        self.choose_btn.pack(side="left", padx=(0, 10))
+
+        self.folder_var = tk.StringVar(value="No folder selected")
+        tk.Label(controls, textvariable=self.folder_var, bg="#353F47", fg="#cad2c5",
+                 font=("Segoe UI", 10), anchor="w").pack(side="left", padx=5)
+
+        progress_frame = tk.Frame(inner_frame, bg="#353F47")
+        progress_frame.pack(fill="x", padx=30, pady=(5, 10))
+
+        self.progress_canvas = tk.Canvas(progress_frame, height=14, bg="#2b363c",
+                                         highlightthickness=1, highlightbackground="#4a595f", bd=0)
+        self.progress_canvas.pack(fill="x")
+        self.progress_bar = self.progress_canvas.create_rectangle(0, 0, 0, 14, fill="#84a98c", width=0)
+
+        self.status_var = tk.StringVar(value="Choose a folder of card scans to grade.")
+        tk.Label(progress_frame, textvariable=self.status_var, bg="#353F47", fg="#d8e2dc",
+                 font=("Segoe UI", 11), anchor="w").pack(fill="x", pady=(6, 0))
+
+        # ==== Results grid ====
+        grid_box = tk.Frame(inner_frame, bg="#2b363c",
+                            highlightbackground="#4a595f", highlightthickness=2)
+        grid_box.pack(fill="both", expand=True, padx=30, pady=(5, 20))
+
+        header = tk.Frame(grid_box, bg="#2b363c", height=BATCH_ROW_HEIGHT + 4)
+        header.pack(fill="x")
+        self.header_labels = {}
+        relx = 0.0
+        for heading, key, width in BATCH_COLUMNS:
+            label = tk.Label(header, text=heading, bg="#2b363c", fg="#cad2c5",
+                             font=("Segoe UI", 11, "bold"), anchor="w", cursor="hand2")
+            label.place(relx=relx, rely=0, relwidth=width, relheight=1)
+            label.bind("<Button-1>", lambda _, k=key: self.sort_by(k))
+            self.header_labels[key] = (label, heading)
+            relx += width
+
+        body = tk.Frame(grid_box, bg="#2b363c")
+        body.pack(fill="both", expand=True)
+
+        self.scrollbar = tk.Scrollbar(body, orient="vertical", command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.rows_frame = tk.Frame(body, bg="#2b363c")
+        self.rows_frame.pack(side="left", fill="both", expand=True)
+        self.rows_frame.bind("<Configure>", self.on_grid_resize)
+        self.rows_frame.bind("<MouseWheel>", self.on_mousewheel)
+        self.rows_frame.bind("<Button-4>", self.on_mousewheel)
+        self.rows_frame.bind("<Button-5>", self.on_mousewheel)
+
+    # ================= BACKGROUND GRADING ================= #
+    def choose_folder(self):
+        if self.worker is not None and self.worker.is_alive():
+            return
+        folder = filedialog.askdirectory(title="Select a Folder of Card Scans")
+        if not folder:
+            return
+        self.folder_var.set(folder)
+        self.results = []
+        self.offset = 0
+        self.total = self.done = 0
+        self.started = time.perf_counter()
+        self.status_var.set("Collecting images...")
+        self.set_progress(0.0)
+        self.refresh_rows()
+
+        # The store is created lazily; do it here so the worker never races the UI for it
+        store = self.controller.results_store
+        self.worker = threading.Thread(target=self.grade_folder, args=(folder, store), daemon=True)
+        self.worker.start()
+        self.after(100, self.poll_events)
+
+    def grade_folder(self, folder, store):
+        """
+        Worker thread: measure with the batch pipeline, predict in chunks.
+        Progress is posted for every file; rows arrive once their chunk is
+        predicted.
+        """
+        try:
+            from MeasurementCalculator import collect_image_files
+            from BatchPipeline import GradingPipeline
+            from Scikit_Learn_Model import predict_card_grades
+
+            files = collect_image_files(folder)
+            self.events.put(("total", len(files)))
+            run = os.path.basename(os.path.abspath(folder))
+            pending = []
+
+            def flush():
+                measured = [(p, m) for p, m, _ in pending if m is not None]
+                predicted = iter(predict_card_grades([m for _, m in measured]))
+                rows = []
+                for path, measurement, error in pending:
+                    row = {"path": path, "filename": os.path.basename(path), "error": error,
+                           "grade": None, "surface": None, "corners": None,
+                           "centering_h": None, "centering_v": None}
+                    if measurement is not None:
+                        row.update(next(predicted))
+                        row["grade"] = row.pop("predicted_grade")
+                    rows.append(row)
+                if measured:
+                    store.add_many(
+                        [r for r in rows if r["error"] is None], source="desktop-batch", run=run)
+                pending.clear()
+                self.events.put(("rows", rows))
+
+            def sink(idx, path, measurement, error):
+                pending.append((path, measurement, error))
+                self.events.put(("progress", 1))
+                if len(pending) >= BATCH_PREDICT_CHUNK:
+                    flush()
+
+            GradingPipeline(metrics=self.controller.metrics).run(files, sink)
+            if pending:
+                flush()
+            self.events.put(("done", None))
+        except Exception as e:
+            self.events.put(("failed", str(e)))
+
+    def poll_events(self):
+        finished = False
+        failure = None
+        new_rows = []
+        try:
+            while True:
+                kind, payload = self.events.get_nowait()
+                if kind == "total":
+                    self.total = payload
+                elif kind == "progress":
+                    self.done += payload
+                elif kind == "rows":
+                    new_rows.extend(payload)
+                elif kind == "done":
+                    finished = True
+                elif kind == "failed":
+                    finished = True
+                    failure = payload
+        except queue.Empty:
+            pass
+
+        if new_rows:
+            self.results.extend(new_rows)
+            if self.sort_key is not None:
+                self.sort_results()
+            self.refresh_rows()
+
+        if failure is not None:
+            self.status_var.set(f"Batch failed: {failure}")
+        elif self.total:
+            self.set_progress(self.done / self.total)
+            self.status_var.set(self.progress_text(finished))
+        elif finished:
+            self.status_var.set("No images found in that folder.")
+
+        if not finished:
+            self.after(100, self.poll_events)
+
+    def progress_text(self, finished):
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        failed = sum(1 for r in self.results if r["error"] is not None)
+        text = f"Graded {self.done} / {self.total}  ·  {rate:.1f} images/s"
+        if finished:
+            text += f"  ·  finished in {format_duration(elapsed)}"
+        elif rate > 0:
+            text += f"  ·  ETA {format_duration((self.total - self.done) / rate)}"
+        if failed:
+            text += f"  ·  {failed} failed"
+        return text
+
+    def set_progress(self, fraction):
+        self.progress_canvas.update_idletasks()
+        width = self.progress_canvas.winfo_width()
+        self.progress_canvas.coords(self.progress_bar, 0, 0, width * fraction, 14)
+
+    # ================= VIRTUALIZED GRID ================= #
+    def on_grid_resize(self, event):
+        visible = max(1, event.height // BATCH_ROW_HEIGHT)
+        if visible == len(self.row_widgets):
+            return
+        for row, _ in self.row_widgets:
+            row.destroy()
+        self.row_widgets = []
+        for slot in range(visible):
+            row = tk.Frame(self.rows_frame, bg="#2b363c", height=BATCH_ROW_HEIGHT, cursor="hand2")
+            row.place(x=0, y=slot * BATCH_ROW_HEIGHT, relwidth=1, height=BATCH_ROW_HEIGHT)
+            cells = []
+            relx = 0.0
+            for _, _, width in BATCH_COLUMNS:
+                cell = tk.Label(row, bg="#2b363c", fg="#f0f0f0", font=("Segoe UI", 10), anchor="w")
+                cell.place(relx=relx, rely=0, relwidth=width, relheight=1)
+                cells.append(cell)
+                relx += width
+            for widget in [row] + cells:
+                widget.bind("<Button-1>", lambda _, s=slot: self.open_result(s))
+                widget.bind("<MouseWheel>", self.on_mousewheel)
+                widget.bind("<Button-4>", self.on_mousewheel)
+                widget.bind("<Button-5>", self.on_mousewheel)
+            self.row_widgets.append((row, cells))
+        self.refresh_rows()
+
+    def refresh_rows(self):
+        visible = len(self.row_widgets)
+        self.offset = max(0, min(self.offset, len(self.results) - visible))
+        for slot, (row, cells) in enumerate(self.row_widgets):
+            idx = self.offset + slot
+            result = self.results[idx] if idx < len(self.results) else None
+            bg = "#2b363c" if slot % 2 == 0 else "#303c42"
+            row.config(bg=bg)
+            for cell, (_, key, _) in zip(cells, BATCH_COLUMNS):
+                if result is None:
+                    text, fg = "", "#f0f0f0"
+                elif result["error"] is not None and key != "filename":
+                    text = "Error" if key == "grade" else ""
+                    fg = "#e07a5f"
+                else:
+                    value = result[key]
+                    text = f"{value:.2f}" if isinstance(value, float) and key != "grade" else str(value)
+                    fg = "#f0f0f0"
+                cell.config(text=text, fg=fg, bg=bg)
+
+        if self.results:
+            first = self.offset / len(self.results)
+            last = min(1.0, (self.offset + visible) / len(self.results))
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_scroll(self, action, amount, unit=None):
+        visible = len(self.row_widgets)
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.results))
+        elif action == "scroll":
+            step = visible if unit == "pages" else 1
+            self.offset += int(amount) * step
+        self.refresh_rows()
+
+    def on_mousewheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.offset -= 3
+        else:
+            self.offset += 3
+        self.refresh_rows()
+
+    def sort_by(self, key):
+        if self.sort_key == key:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_key = key
+            self.sort_descending = key == "grade"   # best grades first
+        for k, (label, heading) in self.header_labels.items():
+            arrow = (" ▼" if self.sort_descending else " ▲") if k == key else ""
+            label.config(text=heading + arrow)
+        self.sort_results()
+        self.offset = 0
+        self.refresh_rows()
+
+    def sort_results(self):
+        key = self.sort_key
+        # Failed rows have no values; keep them at the bottom either way
+        graded = [r for r in self.results if r[key] is not None]
+        missing = [r for r in self.results if r[key] is None]
+        graded.sort(key=lambda r: r[key], reverse=self.sort_descending)
+        self.results = graded + missing
+
+    def open_result(self, slot):
+        idx = self.offset + slot
+        if idx >= len(self.results) or self.results[idx]["error"] is not None:
+            return
+        result = self.results[idx]
+        measurements = (result["surface"], result["corners"],
+                        result["centering_h"], result["centering_v"])
+        user_data = {
+            "grade": result["grade"],
+            "surface": result["surface"],
+            "corners": result["corners"],
+            "centering_h": result["centering_h"],
+            "centering_v": result["centering_v"],
+            "similar_card_path": find_similar_card_path(result["grade"], measurements)
+        }
+        results_page = self.controller.show_page(ResultsPage)
+        results_page.show_submitted_file(result["path"])
+        results_page.update_results(user_data)
+
+
+def format_duration(seconds):
+    """Seconds as m:ss, or h:mm:ss once a batch runs that long."""
+    seconds = int(round(seconds))
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
 # ---------- RUN APP ----------
 if __name__ == "__main__":
     app = AIPokemonGraderApp()
@@ -0,0 +1,126 @@
+import os
+import time
+import cv2
+import numpy as np
+
+# ---------- Constants ----------
+HASH_SIZE = 16            # 16x16 difference hash -> 256 bits
+MIN_THUMB_SIDE = 128      # smallest thumbnail side the hash is computed from
+
+# JPEG decoders can downscale during decode (DCT scaling), so the cheapest
+# reduction that still leaves a usable thumbnail is tried first.
+REDUCED_GRAYSCALE_FLAGS = (
+    cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    cv2.IMREAD_GRAYSCALE,
+)
+
+
+def load_thumbnail(image_path, min_side=MIN_THUMB_SIDE):
+    """Decodes a small greyscale version of the image, or returns None if unreadable."""
+    thumb = None
+    for flag in REDUCED_GRAYSCALE_FLAGS:
+        thumb = cv2.imread(image_path, flag)
+        if thumb is None or min(thumb.shape[:2]) >= min_side:
+            break
+    return thumb
+
+
+def difference_hash(gray, hash_size=HASH_SIZE):
+    """
+    dHash: shrink to (hash_size+1) x hash_size and record whether each pixel is
+    brighter than its right-hand neighbour. Returns the bits packed into an int.
+    """
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+# ---------- BK-Tree ----------
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes with Hamming distance. A radius
+    query only descends into children whose edge distance lies within
+    [d - radius, d + radius], so most of the tree is never visited.
+    """
+
+    def __init__(self):
+        self.root = None  # [hash, item, {distance: child}]
+
+    def add(self, hash_value, item):
+        node = [hash_value, item, {}]
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            d = hamming_distance(hash_value, current[0])
+            child = current[2].get(d)
+            if child is None:
+                current[2][d] = node
+                return
+            current = child
+
+    def search(self, hash_value, radius):
+        """Returns [(distance, item)] for every stored hash within radius."""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            h, item, children = stack.pop()
+            d = hamming_distance(hash_value, h)
+            if d <= radius:
+                found.append((d, item))
+            for edge, child in children.items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+        return found
+
+
+# ---------- Grouping ----------
+def find_duplicate_groups(files, max_distance=10):
+    """
+    Groups near-duplicate scans. Every file lands in exactly one group and the
+    first member of each group is its representative (the one to measure).
+    Unreadable files get a group of their own so the caller still reports them.
+
+    Returns (groups, seconds spent hashing).
+    """
+    start = time.perf_counter()
+    tree = BKTree()
+    groups = []
+
+    for fpath in files:
+        thumb = load_thumbnail(fpath)
+        if thumb is None:
+            groups.append([fpath])
+            continue
+
+        h = difference_hash(thumb)
+        matches = tree.search(h, max_distance)
+        if matches:
+            _, group_idx = min(matches)
+            groups[group_idx].append(fpath)
+        else:
+            tree.add(h, len(groups))
+            groups.append([fpath])
+
+    return groups, time.perf_counter() - start
+
+
+def duplicate_report(groups, hash_seconds, seconds_per_measurement):
+    """Summary of the duplicate pre-pass, suitable for json.dump."""
+    duplicates = [g for g in groups if len(g) > 1]
+    skipped = sum(len(g) - 1 for g in duplicates)
+    return {
+        "groups": [[os.path.basename(f) for f in g] for g in duplicates],
+        "duplicates_skipped": skipped,
+        "hash_seconds": round(hash_seconds, 3),
+        "estimated_seconds_saved": round(skipped * seconds_per_measurement - hash_seconds, 3),
+    }
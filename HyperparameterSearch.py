@@ -0,0 +1,189 @@
+import csv
+import time
+import pickle
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import KFold, ParameterGrid, ParameterSampler
+
+from paths import resource_path
+from Scheduler import available_cores
+from ModelUpdater import load_training_data
+
+# ---------- Constants ----------
+# The shipped model is n_estimators=200 with scikit-learn defaults otherwise
+DEFAULT_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [None, 8, 12],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": [1.0, 0.5],
+}
+LATENCY_REPEATS = 25
+LEADERBOARD_FIELDS = ("rank", "params", "mae", "mae_std", "folds", "size_kb",
+                      "predict_ms", "batch_predict_ms", "fit_seconds", "per_grade_mae")
+
+
+# ---------- Folds ----------
+def make_folds(X, y, n_splits=5, seed=42):
+    """
+    Splits once into contiguous per-fold arrays (X_train, y_train, X_test,
+    y_test), which are then shared by every configuration evaluated.
+    """
+    folds = []
+    for train, test in KFold(n_splits=n_splits, shuffle=True, random_state=seed).split(X):
+        folds.append((np.ascontiguousarray(X[train]), y[train],
+                      np.ascontiguousarray(X[test]), y[test]))
+    return folds
+
+
+def candidate_params(grid=None, n_random=None, seed=42):
+    """Every combination of grid, or n_random combinations sampled from it."""
+    grid = grid or DEFAULT_GRID
+    if n_random:
+        return list(ParameterSampler(grid, n_iter=n_random, random_state=seed))
+    return list(ParameterGrid(grid))
+
+
+# ---------- One Evaluation ----------
+def evaluate_fold(params, fold, seed=42):
+    """
+    Fits one configuration on one fold. Single-threaded, since the search
+    parallelises across (configuration, fold) pairs instead.
+    """
+    X_train, y_train, X_test, y_test = fold
+    model = RandomForestRegressor(random_state=seed, n_jobs=1, **params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predicted = model.predict(X_test)
+    batch_seconds = time.perf_counter() - start
+
+    # Desktop-style latency: one card per predict call
+    row = X_test[:1]
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+
+    errors = np.abs(predicted - y_test)
+    per_grade = {}
+    for grade, err in zip(y_test, errors):
+        total, n = per_grade.get(float(grade), (0.0, 0))
+        per_grade[float(grade)] = (total + float(err), n + 1)
+
+    return {
+        "abs_error_sum": float(errors.sum()),
+        "n": len(errors),
+        "per_grade": per_grade,
+        "fit_seconds": fit_seconds,
+        "batch_predict_seconds": batch_seconds,
+        "predict_seconds": float(np.median(timings)),
+        "size_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+    }
+
+
+def _summarise(params, fold_results):
+    n = sum(r["n"] for r in fold_results)
+    fold_mae = [r["abs_error_sum"] / r["n"] for r in fold_results]
+    per_grade = {}
+    for r in fold_results:
+        for grade, (total, count) in r["per_grade"].items():
+            t, c = per_grade.get(grade, (0.0, 0))
+            per_grade[grade] = (t + total, c + count)
+    return {
+        "params": params,
+        "mae": round(sum(r["abs_error_sum"] for r in fold_results) / n, 4),
+        "mae_std": round(float(np.std(fold_mae)), 4),
+        "folds": len(fold_results),
+        "size_kb": round(np.mean([r["size_bytes"] for r in fold_results]) / 1024, 1),
+        "predict_ms": round(1000 * np.median([r["predict_seconds"] for r in fold_results]), 3),
+        "batch_predict_ms": round(1000 * np.mean([r["batch_predict_seconds"] for r in fold_results]), 3),
+        "fit_seconds": round(float(np.mean([r["fit_seconds"] for r in fold_results])), 3),
+        "per_grade_mae": {g: round(t / c, 3) for g, (t, c) in sorted(per_grade.items())},
+    }
+
+
+# ---------- Search ----------
+def search(X, y, candidates, n_splits=5, eta=2, n_jobs=None, seed=42, verbose=True):
+    """
+    Successive halving over folds: every candidate is scored on the first
+    fold, the best 1/eta continue to the next rung with more folds, and so
+    on until the survivors have been scored on all n_splits folds; a lone
+    survivor goes straight to all of them. Fold results are kept, so a rung only fits the folds a candidate has not
+    seen yet. (configuration, fold) fits run in parallel on all cores.
+
+    Returns the leaderboard: fully evaluated candidates first (by MAE),
+    then the ones stopped early, each with the folds it was scored on.
+    """
+    folds = make_folds(X, y, n_splits, seed)
+    n_jobs = n_jobs or available_cores()
+    results = {i: [] for i in range(len(candidates))}
+    alive = list(range(len(candidates)))
+    rung_folds = 1
+
+    with Parallel(n_jobs=n_jobs) as parallel:
+        while True:
+            jobs = [(i, f) for i in alive for f in range(len(results[i]), rung_folds)]
+            start = time.perf_counter()
+            outputs = parallel(delayed(evaluate_fold)(candidates[i], folds[f], seed) for i, f in jobs)
+            for (i, _), out in zip(jobs, outputs):
+                results[i].append(out)
+            if verbose:
+                print(f"Rung with {rung_folds} fold(s): {len(alive)} candidates, "
+                      f"{len(jobs)} fits in {time.perf_counter() - start:.1f}s")
+            if rung_folds == n_splits:
+                break
+            alive.sort(key=lambda i: _summarise(candidates[i], results[i])["mae"])
+            alive = alive[:max(1, len(alive) // eta)]
+            if len(alive) == 1:
+                rung_folds = n_splits   # the winner: fit its remaining folds
+            else:
+                rung_folds = min(n_splits, rung_folds * eta)
+
+    board = [_summarise(candidates[i], results[i]) for i in range(len(candidates)) if results[i]]
+    board.sort(key=lambda r: (-r["folds"], r["mae"]))
+    for rank, row in enumerate(board, 1):
+        row["rank"] = rank
+    return board
+
+
+# ---------- Output ----------
+def print_leaderboard(board, top=15):
+    print(f"{'#':>3}  {'MAE':>6} {'±':>6} {'folds':>5} {'size KB':>8} {'1-card ms':>9} "
+          f"{'fit s':>6}  params")
+    for row in board[:top]:
+        print(f"{row['rank']:>3}  {row['mae']:>6.3f} {row['mae_std']:>6.3f} {row['folds']:>5} "
+              f"{row['size_kb']:>8.1f} {row['predict_ms']:>9.3f} {row['fit_seconds']:>6.2f}  "
+              f"{row['params']}")
+    if board:
+        worst = sorted(board[0]["per_grade_mae"].items(), key=lambda kv: -kv[1])[:3]
+        print("Best config's largest per-grade errors: "
+              + ", ".join(f"PSA {g:g}: {e:.2f}" for g, e in worst))
+
+
+def write_leaderboard(board, csv_path):
+    with open(csv_path, "w", newline="", encoding="utf-8") as fout:
+        writer = csv.DictWriter(fout, fieldnames=LEADERBOARD_FIELDS)
+        writer.writeheader()
+        for row in board:
+            writer.writerow(row)
+    return len(board)
+
+
+if __name__ == "__main__":
+    import sys
+    # python HyperparameterSearch.py [random samples] [leaderboard.csv]
+    n_random = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    _, X, y = load_training_data(resource_path("trainingData.txt"))
+    candidates = candidate_params(n_random=n_random)
+    print(f"Searching {len(candidates)} configurations on {len(y)} cards "
+          f"with {available_cores()} core(s)...")
+    board = search(X, y, candidates)
+    print_leaderboard(board)
+    if len(sys.argv) > 2:
+        write_leaderboard(board, sys.argv[2])
+        print(f"Leaderboard written to {sys.argv[2]}")
@@ -4,82 +4,200 @@ import os
 import glob
 import traceback
 import csv
+import json
+import time
 
 from paths import resource_path
+from DuplicateDetector import find_duplicate_groups, duplicate_report
+from QualityGate import assess_image_quality, QualityTally
+from Metrics import (GradingMetrics, print_event, SUCCESS, UNREADABLE, NO_CONTOUR, ERROR,
+                     QUALITY_REJECTED, FALLBACK_INNER_BOX, CLAMPED_MARGINS)
 
 # ---------- Constants (standard TCG card) ----------
 CARD_WIDTH_MM = 63.5
 CARD_HEIGHT_MM = 88.9
 
+# Scoring parameters (defaults of compute_surface_score, compute_corners_score
+# and mm_to_center_decimal)
+SURFACE_CANNY = (60, 180)
+CORNER_BORDER_PX = 20
+# (max mm imbalance, centering decimal); anything worse is 0.90
+CENTERING_BINS = (
+    (1, 0.55),   # ~55/45
+    (2, 0.60),   # ~60/40
+    (3, 0.65),   # ~65/35
+    (4, 0.70),   # ~70/30
+    (6, 0.80),   # ~80/20
+    (8, 0.85),   # ~85/15
+)
+CENTERING_WORST = 0.90   # ~90/10 or worse
+
+
+# ---------- Errors ----------
+# Both subclass ValueError, which is what callers have always caught
+class UnreadableImageError(ValueError):
+    pass
+
+class CardNotDetectedError(ValueError):
+    pass
+
+def error_outcome(exc):
+    """Metrics outcome category for an exception raised while measuring."""
+    if isinstance(exc, UnreadableImageError):
+        return UNREADABLE
+    if isinstance(exc, CardNotDetectedError):
+        return NO_CONTOUR
+    return ERROR
+
+
+# ---------- Image Sources ----------
+def load_card_image(source):
+    """
+    BGR uint8 image from any supported source:
+
+      path (str / PathLike)              read and decoded with cv2.imread
+      bytes / bytearray / memoryview     an encoded image (JPEG, PNG, ...)
+      1-D uint8 array                    an encoded image
+      (H, W, 3) uint8 array              used as is, no copy (e.g. a RawFrameDump view)
+      (H, W) or (H, W, 4) uint8 array    converted to BGR
 
-def process_single_card(IMAGE_PATH: str):
-    # ---------- Process Single Image ----------
-    image = cv2.imread(IMAGE_PATH)
+    Raises UnreadableImageError when the source cannot be decoded.
+    """
+    if isinstance(source, np.ndarray):
+        if source.ndim == 3 and source.shape[2] == 3:
+            return source
+        if source.ndim == 1:
+            source = memoryview(np.ascontiguousarray(source, dtype=np.uint8))
+        elif source.ndim == 2:
+            return cv2.cvtColor(source, cv2.COLOR_GRAY2BGR)
+        elif source.ndim == 3 and source.shape[2] == 4:
+            return cv2.cvtColor(source, cv2.COLOR_BGRA2BGR)
+        else:
+            raise UnreadableImageError(f"Unsupported image array shape {source.shape}")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        image = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise UnreadableImageError("Could not decode image bytes")
+        return image
+    image = cv2.imread(os.fspath(source))
     if image is None:
-        raise ValueError(f"Could not read image at {IMAGE_PATH}")
+        raise UnreadableImageError(f"Could not read image at {source}")
+    return image
 
-    card_contour = detect_card_contour(image)
-    if card_contour is None:
-        raise ValueError("Card contour not detected.")
+class RawFrameDump:
+    """
+    Fixed-size raw frames stored back to back in one file, as capture
+    software dumps them: optional header, then one frame every frame_stride
+    bytes (height * width * channels when frames are not padded).
+
+    The file is memory-mapped read-only. Indexing and iteration return
+    (height, width, channels) uint8 views into the mapping, so nothing is
+    copied or decoded and only the pages of frames actually used are read.
+    Views stay valid until the dump object and every view are released.
+    """
 
-    warped = four_point_transform(image, card_contour)
-    warped_h, warped_w = warped.shape[:2]
+    def __init__(self, path, width, height, channels=3, header_bytes=0, frame_stride=None):
+        self.path = path
+        self.shape = (height, width, channels)
+        frame_bytes = width * height * channels
+        self.frame_stride = frame_stride or frame_bytes
+        if self.frame_stride < frame_bytes:
+            raise ValueError("frame_stride is smaller than one frame")
+
+        data_bytes = os.path.getsize(path) - header_bytes
+        # The last frame does not need its trailing padding
+        count = 0 if data_bytes < frame_bytes else (data_bytes - frame_bytes) // self.frame_stride + 1
+        if count:
+            mapped = np.memmap(path, dtype=np.uint8, mode="r", offset=header_bytes,
+                               shape=((count - 1) * self.frame_stride + frame_bytes,))
+            self._frames = np.lib.stride_tricks.as_strided(
+                mapped, shape=(count,) + self.shape,
+                strides=(self.frame_stride, width * channels, channels, 1), writeable=False)
+        else:
+            self._frames = np.empty((0,) + self.shape, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __getitem__(self, index):
+        return self._frames[index]
+
+    def __iter__(self):
+        return iter(self._frames)
+
+    def close(self):
+        # The mapping is unmapped once the last view referencing it is gone
+        self._frames = np.empty((0,) + self.shape, dtype=np.uint8)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_raw_frames(path, frames, append=True):
+    """Appends BGR frames to a raw dump readable by RawFrameDump; returns frames written."""
+    written = 0
+    with open(path, "ab" if append else "wb") as f:
+        for frame in frames:
+            f.write(memoryview(np.ascontiguousarray(frame, dtype=np.uint8)).cast("B"))
+            written += 1
+    return written
+
+
+def process_single_card(IMAGE_PATH, metrics=None):
+    """
+    Measures one card from a path, encoded bytes or an in-memory BGR frame
+    (anything load_card_image accepts), so captured frames need no file
+    round-trip.
+    """
+    start = time.perf_counter()
+    image = load_card_image(IMAGE_PATH)
+    if metrics is not None:
+        metrics.observe("decode", time.perf_counter() - start)
 
-    ppm_w = warped_w / CARD_WIDTH_MM
-    ppm_h = warped_h / CARD_HEIGHT_MM
-    pixels_per_mm = (ppm_w + ppm_h) / 2.0
-    if pixels_per_mm <= 0:
-        raise ValueError("Invalid pixel/mm calculation.")
+    return measure_card_image(image, metrics=metrics)
 
-    inner = detect_inner_artwork(warped)
-    if inner is None:
-        ix, iy, iw, ih = fallback_inner_box(warped_w, warped_h)
-    else:
-        ix, iy, iw, ih = inner
-
-    if iw <= 0 or ih <= 0 or iw > warped_w*0.95 or ih > warped_h*0.95:
-        ix, iy, iw, ih = fallback_inner_box(warped_w, warped_h)
+def measure_card_image(image, scan_step=1, color_tol=20, artwork_engine="contours",
+                       centering_engine="artwork", metrics=None, border_px=CORNER_BORDER_PX):
+    """
+    Runs the full measurement pipeline on an already decoded BGR image:
+    card detection, perspective warp, then scoring of the warped card.
+    With a GradingMetrics, each stage's latency is recorded. Pass a
+    proportionally smaller border_px for an image decoded at reduced size.
+    """
+    start = time.perf_counter()
+    card_contour = detect_card_contour(image, scan_step=scan_step, color_tol=color_tol)
+    if card_contour is None:
+        raise CardNotDetectedError("Card contour not detected.")
 
-    left_mm = ix / pixels_per_mm
-    right_mm = (warped_w - (ix + iw)) / pixels_per_mm
-    top_mm = iy / pixels_per_mm
-    bottom_mm = (warped_h - (iy + ih)) / pixels_per_mm
-
-    left_mm = min(left_mm, CARD_WIDTH_MM / 2)
-    right_mm = min(right_mm, CARD_WIDTH_MM / 2)
-    top_mm = min(top_mm, CARD_HEIGHT_MM / 2)
-    bottom_mm = min(bottom_mm, CARD_HEIGHT_MM / 2)
-
-    # Centering differences (mm imbalance)
-    horiz_diff = abs(left_mm - right_mm)
-    vert_diff = abs(top_mm - bottom_mm)
-
-    def mm_to_center_decimal(diff):
-        """
-        Convert mm difference to standardized centering decimal:
-        0.55, 0.60, 0.65, 0.70, 0.80, 0.85, 0.90
-        """
-        if diff <= 1:        # ~55/45
-            return 0.55
-        elif diff <= 2:      # ~60/40
-            return 0.60
-        elif diff <= 3:      # ~65/35
-            return 0.65
-        elif diff <= 4:      # ~70/30
-            return 0.70
-        elif diff <= 6:      # ~80/20
-            return 0.80
-        elif diff <= 8:      # ~85/15
-            return 0.85
-        else:                # ~90/10 or worse
-            return 0.90
-
-    # Assign grading decimals
-    psa_h = mm_to_center_decimal(horiz_diff)
-    psa_v = mm_to_center_decimal(vert_diff)
-
-    surface_score = compute_surface_score(warped)
-    corners_score = compute_corners_score(warped)
+    warped = four_point_transform(image, card_contour)
+    if metrics is not None:
+        metrics.observe("detect_and_warp", time.perf_counter() - start)
+    return measure_warped_card(warped, artwork_engine=artwork_engine,
+                               centering_engine=centering_engine, metrics=metrics,
+                               border_px=border_px)
+
+def measure_warped_card(warped, artwork_engine="contours", centering_engine="artwork",
+                        metrics=None, surface_canny=SURFACE_CANNY, border_px=CORNER_BORDER_PX,
+                        centering_bins=CENTERING_BINS):
+    """Scores a perspective-corrected card image."""
+    start = time.perf_counter()
+    borders = measure_border_mm(warped, centering_engine=centering_engine,
+                                artwork_engine=artwork_engine)
+    psa_h, psa_v, clamped = centering_from_borders(borders, centering_bins)
+    if metrics is not None:
+        metrics.observe("centering", time.perf_counter() - start)
+        if borders["fallback"]:
+            metrics.flag(FALLBACK_INNER_BOX)
+        if clamped:
+            metrics.flag(CLAMPED_MARGINS)
+
+    start = time.perf_counter()
+    surface_score = compute_surface_score(warped, *surface_canny)
+    corners_score = compute_corners_score(warped, border_px=border_px)
+    if metrics is not None:
+        metrics.observe("surface_and_corners", time.perf_counter() - start)
 
     # Debug printout
     # print(f"warped_px: {warped_w}x{warped_h}, pixels_per_mm: {pixels_per_mm:.4f}")
@@ -95,143 +213,238 @@ def process_single_card(IMAGE_PATH: str):
         "centering_v": psa_v,
     }
 
+def measure_border_mm(warped, centering_engine="artwork", artwork_engine="contours"):
+    """
+    Raw left/right/top/bottom border widths of a warped card in mm.
+
+    centering_engine="artwork" takes the box from detect_inner_artwork;
+    centering_engine="profile" finds the inner frame edges with
+    inner_frame_profile. Either way an implausible or missing box falls back
+    to fallback_inner_box, which is reported as "fallback": True.
+    """
+    warped_h, warped_w = warped.shape[:2]
+
+    ppm_w = warped_w / CARD_WIDTH_MM
+    ppm_h = warped_h / CARD_HEIGHT_MM
+    pixels_per_mm = (ppm_w + ppm_h) / 2.0
+    if pixels_per_mm <= 0:
+        raise ValueError("Invalid pixel/mm calculation.")
+
+    if centering_engine == "artwork":
+        inner = detect_inner_artwork(warped, engine=artwork_engine)
+        if inner is not None:
+            ix, iy, iw, ih = inner
+            if iw <= 0 or ih <= 0 or iw > warped_w*0.95 or ih > warped_h*0.95:
+                inner = None
+    elif centering_engine == "profile":
+        # Every edge is confined to its border search window, so the box is
+        # always plausible when found
+        inner = inner_frame_profile(warped)
+    else:
+        raise ValueError(f"Unknown centering engine: {centering_engine}")
+
+    fallback = inner is None
+    if not fallback:
+        ix, iy, iw, ih = inner
+    if fallback:
+        ix, iy, iw, ih = fallback_inner_box(warped_w, warped_h)
+
+    return {
+        "left_mm": ix / pixels_per_mm,
+        "right_mm": (warped_w - (ix + iw)) / pixels_per_mm,
+        "top_mm": iy / pixels_per_mm,
+        "bottom_mm": (warped_h - (iy + ih)) / pixels_per_mm,
+        "fallback": fallback,
+    }
+
+def centering_from_borders(borders, centering_bins=CENTERING_BINS):
+    """
+    Centering decimals (psa_h, psa_v) from measure_border_mm output, plus
+    whether any margin had to be clamped to half the card.
+    """
+    left_mm = min(borders["left_mm"], CARD_WIDTH_MM / 2)
+    right_mm = min(borders["right_mm"], CARD_WIDTH_MM / 2)
+    top_mm = min(borders["top_mm"], CARD_HEIGHT_MM / 2)
+    bottom_mm = min(borders["bottom_mm"], CARD_HEIGHT_MM / 2)
+    clamped = (left_mm, right_mm, top_mm, bottom_mm) != (borders["left_mm"], borders["right_mm"],
+                                                         borders["top_mm"], borders["bottom_mm"])
+
+    # Centering differences (mm imbalance) -> grading decimals
+    psa_h = mm_to_center_decimal(abs(left_mm - right_mm), centering_bins)
+    psa_v = mm_to_center_decimal(abs(top_mm - bottom_mm), centering_bins)
+    return psa_h, psa_v, clamped
+
+def mm_to_center_decimal(diff, centering_bins=CENTERING_BINS):
+    """
+    Convert mm difference to standardized centering decimal:
+    0.55, 0.60, 0.65, 0.70, 0.80, 0.85, 0.90 with the default CENTERING_BINS
+    """
+    for max_diff, decimal in centering_bins:
+        if diff <= max_diff:
+            return decimal
+    return CENTERING_WORST
+
 # ---------- Batch Processing Function ----------
+CSV_HEADER = [
+    "filename",
+    "surface_score",
+    "corners_score",
+    "centering_h_label",
+    "centering_v_label"
+]
+
+def collect_image_files(folder_path, supported_exts=(".jpg", ".jpeg", ".png", ".bmp")):
+    """Sorted, de-duplicated list of image paths directly inside folder_path."""
+    files = []
+    for ext in supported_exts:
+        files.extend(glob.glob(os.path.join(folder_path, f"*{ext}")))
+        files.extend(glob.glob(os.path.join(folder_path, f"*{ext.upper()}")))
+    return sorted(set(files))
+
+def measurement_row(fname, measurement):
+    """CSV row for one measured card, in CSV_HEADER order."""
+    return [
+        fname,
+        measurement["surface"],
+        measurement["corners"],
+        measurement["centering_h"],
+        measurement["centering_v"]
+    ]
+
 def imgFolderToTxtFile(folder_path,
                        output_csv_path,
                        supported_exts=(".jpg", ".jpeg", ".png", ".bmp"),
                        scan_step=5,
-                       color_tol=30):
+                       color_tol=30,
+                       dedupe=False,
+                       dedupe_max_distance=10,
+                       dedupe_report_path=None,
+                       artwork_engine="contours",
+                       centering_engine="artwork",
+                       quality_gate=None,
+                       metrics=None,
+                       metrics_path=None,
+                       store=None):
     """
     Outputs CSV rows:
     filename, surface_score, corners_score, centering_h_label, centering_v_label
     (NO percentages)
+
+    With dedupe=True a perceptual-hash pre-pass groups repeated scans of the same
+    card; each group is measured once and its row is written for every member.
+
+    quality_gate="reject" skips images that fail QualityGate.assess_image_quality
+    before any full-size decode; "flag" only reports them. Either way the reject
+    rate per reason is printed at the end.
+
+    Every image's outcome and stage latencies go to metrics (a GradingMetrics;
+    by default one that prints each outcome). With metrics_path the run
+    summary is written there as JSON.
+
+    With a ResultsStore, every written row is also graded and stored in one
+    transaction at the end of the run.
     """
+    if metrics is None:
+        metrics = GradingMetrics(run_name=os.path.basename(os.path.abspath(folder_path)),
+                                 hooks=[print_event])
 
     folder_path = os.path.abspath(folder_path)
     output_csv_path = os.path.abspath(output_csv_path)
 
     # Collect image files
-    files = []
-    for ext in supported_exts:
-        files.extend(glob.glob(os.path.join(folder_path, f"*{ext}")))
-        files.extend(glob.glob(os.path.join(folder_path, f"*{ext.upper()}")))
-    files = sorted(set(files))
+    files = collect_image_files(folder_path, supported_exts)
 
     if not files:
         print(f"No images found in {folder_path}.")
         return 0
 
+    # Duplicate pre-pass: measure only one representative per group
+    duplicate_groups = None
+    if dedupe:
+        duplicate_groups, hash_seconds = find_duplicate_groups(files, max_distance=dedupe_max_distance)
+        members_of = {group[0]: group for group in duplicate_groups}
+        files = [group[0] for group in duplicate_groups]
+
     os.makedirs(os.path.dirname(output_csv_path), exist_ok=True)
 
     # Append header if file does not yet exist
     write_header = not os.path.exists(output_csv_path)
 
+    measure_seconds = 0.0
+    measured = 0
+    tally = QualityTally() if quality_gate else None
+    stored = []
+
     with open(output_csv_path, "a", newline="", encoding="utf-8") as fout:
         writer = csv.writer(fout)
 
         if write_header:
-            writer.writerow([
-                "filename",
-                "surface_score",
-                "corners_score",
-                "centering_h_label",
-                "centering_v_label"
-            ])
+            writer.writerow(CSV_HEADER)
 
         processed = 0
 
         for fpath in files:
             fname = os.path.basename(fpath)
 
+            start = time.perf_counter()
             try:
+                if tally is not None:
+                    report = assess_image_quality(fpath)
+                    metrics.observe("quality_gate", report["seconds"])
+                    tally.add(report)
+                    if not report["ok"]:
+                        if quality_gate == "reject":
+                            metrics.record(fpath, QUALITY_REJECTED, reasons=report["reasons"])
+                            continue
+                        print(f"Quality {quality_gate}: {fname} {','.join(report['reasons'])}")
+
+                start = time.perf_counter()
                 image = cv2.imread(fpath)
                 if image is None:
-                    print(f"Skipping unreadable: {fname}")
-                    continue
-
-                card_contour = detect_card_contour(image, scan_step=scan_step, color_tol=color_tol)
-                if card_contour is None:
-                    print(f"No contour found: {fname}")
-                    continue
-
-                warped = four_point_transform(image, card_contour)
-                warped_h, warped_w = warped.shape[:2]
-
-                ppm_w = warped_w / CARD_WIDTH_MM
-                ppm_h = warped_h / CARD_HEIGHT_MM
-                pixels_per_mm = (ppm_w + ppm_h) / 2.0
-                if pixels_per_mm <= 0:
-                    print(f"Invalid px/mm: {fname}")
-                    continue
-
-                inner = detect_inner_artwork(warped)
-                if inner is None:
-                    ix, iy, iw, ih = fallback_inner_box(warped_w, warped_h)
-                else:
-                    ix, iy, iw, ih = inner
-
-                if iw <= 0 or ih <= 0 or iw > warped_w * 0.95 or ih > warped_h * 0.95:
-                    ix, iy, iw, ih = fallback_inner_box(warped_w, warped_h)
-
-                # --- Calculate mm ---
-                left_mm = ix / pixels_per_mm
-                right_mm = (warped_w - (ix + iw)) / pixels_per_mm
-                top_mm = iy / pixels_per_mm
-                bottom_mm = (warped_h - (iy + ih)) / pixels_per_mm
-
-                left_mm = min(left_mm, CARD_WIDTH_MM / 2)
-                right_mm = min(right_mm, CARD_WIDTH_MM / 2)
-                top_mm = min(top_mm, CARD_HEIGHT_MM / 2)
-                bottom_mm = min(bottom_mm, CARD_HEIGHT_MM / 2)
-
-                # Centering differences (mm imbalance)
-                horiz_diff = abs(left_mm - right_mm)
-                vert_diff = abs(top_mm - bottom_mm)
-
-                def mm_to_center_decimal(diff):
-                    """
-                    Convert mm difference to standardized centering decimal:
-                    0.55, 0.60, 0.65, 0.70, 0.80, 0.85, 0.90
-                    """
-                    if diff <= 1:        # ~55/45
-                        return 0.55
-                    elif diff <= 2:      # ~60/40
-                        return 0.60
-                    elif diff <= 3:      # ~65/35
-                        return 0.65
-                    elif diff <= 4:      # ~70/30
-                        return 0.70
-                    elif diff <= 6:      # ~80/20
-                        return 0.80
-                    elif diff <= 8:      # ~85/15
-                        return 0.85
-                    else:                # ~90/10 or worse
-                        return 0.90
-
-                # Assign grading decimals
-                psa_h = mm_to_center_decimal(horiz_diff)
-                psa_v = mm_to_center_decimal(vert_diff)
-
-                surface_score = compute_surface_score(warped)
-                corners_score = compute_corners_score(warped)
-
-                # --- Write clean CSV row ---
-                writer.writerow([
-                    fname,
-                    surface_score,
-                    corners_score,
-                    psa_h,
-                    psa_v
-                ])
-
-                processed += 1
-                print(f"Processed: {fname}")
+                    raise UnreadableImageError(f"Could not read image at {fpath}")
+                metrics.observe("decode", time.perf_counter() - start)
+
+                measurement = measure_card_image(image, scan_step=scan_step, color_tol=color_tol,
+                                                 artwork_engine=artwork_engine,
+                                                 centering_engine=centering_engine,
+                                                 metrics=metrics)
+                measure_seconds += time.perf_counter() - start
+                measured += 1
+
+                # --- Write clean CSV row(s) ---
+                targets = members_of[fpath] if duplicate_groups is not None else [fpath]
+                for member in targets:
+                    writer.writerow(measurement_row(os.path.basename(member), measurement))
+                    processed += 1
+                    if store is not None:
+                        stored.append((member, measurement))
+                metrics.record(fpath, SUCCESS, seconds=time.perf_counter() - start)
 
             except Exception as e:
-                print(f"Error processing {fname}: {e}")
-                traceback.print_exc()
+                outcome = error_outcome(e)
+                metrics.record(fpath, outcome, error=str(e), seconds=time.perf_counter() - start,
+                               traceback=traceback.format_exc() if outcome == ERROR else None)
                 continue
 
+    if duplicate_groups is not None:
+        report = duplicate_report(duplicate_groups, hash_seconds,
+                                  measure_seconds / measured if measured else 0.0)
+        print(f"Duplicates: {report['duplicates_skipped']} scans skipped in "
+              f"{len(report['groups'])} groups, ~{report['estimated_seconds_saved']:.1f}s saved.")
+        if dedupe_report_path:
+            with open(dedupe_report_path, "w", encoding="utf-8") as frep:
+                json.dump(report, frep, indent=2)
+
+    if tally is not None:
+        summary = tally.summary()
+        print(f"Quality gate: {summary['rejected']}/{summary['checked']} failed "
+              f"({summary['reject_rate'] * 100:.1f}%) {summary['reasons']}")
+
+    if metrics_path:
+        metrics.write_summary(metrics_path)
+    if store is not None:
+        store.add_measurements(stored, run=metrics.run_name)
+
     print(f"Completed. {processed} images written to CSV.")
     return processed
 
@@ -260,11 +473,59 @@ def four_point_transform(image, pts):
     warped = cv2.warpPerspective(image, M, (maxWidth, maxHeight))
     return warped
 
+_CROSSING_CHUNK = 16   # coarse samples per vectorized test
+
+def _first_crossing(line, ref_color, scan_step=1, color_tol=20, min_run=2):
+    """
+    Index of the first pixel of line (ordered from the image edge inwards)
+    that starts a run of min_run pixels all further than color_tol from
+    ref_color, or 0 when there is none.
+
+    Coarse to fine: every scan_step-th pixel is tested in vectorized
+    chunks, then each coarse hit's interval (back to the previous coarse
+    sample) is searched pixel by pixel. The result is exact to the pixel at
+    any scan_step; a lone outlier pixel fails the run test and the search
+    moves on to the next coarse hit. Only features thinner than scan_step
+    can be skipped over.
+    """
+    n = len(line)
+    ref_color = np.asarray(ref_color, dtype=np.float32)
+    # Coarse samples are tested a chunk at a time, since borders are usually
+    # found near the edge and the rest of the line never needs to be touched
+    chunk = _CROSSING_CHUNK * scan_step
+    for start in range(0, n, chunk):
+        samples = line[start:start + chunk:scan_step].astype(np.float32)
+        coarse = np.linalg.norm(samples - ref_color, axis=1) > color_tol
+        for k in np.flatnonzero(coarse):
+            pos = start + int(k) * scan_step
+            lo = max(0, pos - scan_step + 1)
+            hi = min(n, pos + min_run)
+            fine = np.linalg.norm(line[lo:hi].astype(np.float32) - ref_color, axis=1) > color_tol
+            if min_run > 1:
+                # fine[j] becomes True only if pixels j .. j+min_run-1 all differ
+                m = fine.size - min_run + 1
+                if m <= 0:
+                    continue
+                runs = fine[:m].copy()
+                for j in range(1, min_run):
+                    runs &= fine[j:j + m]
+                fine = runs
+            hits = np.flatnonzero(fine)
+            if hits.size:
+                return lo + int(hits[0])
+    return 0
+
 def detect_card_contour(image, scan_step=1, color_tol=20, min_border_width_ratio=0.05,
-                        sample_lines=7):
+                        sample_lines=7, min_run=2):
     """
     Wrapper that returns 4 corner points (tl, tr, br, bl) suitable for four_point_transform().
     Internally uses detect_outer_border (averaging across several center scan lines to be robust).
+
+    scan_step is the coarse stride of the border search; the crossing is
+    always refined to the exact pixel (see _first_crossing), so larger steps
+    only trade away the detection of sub-stride features, not accuracy.
+    min_run pixels in a row must differ from the edge colour to count as
+    the border, which keeps single noisy pixels from ending the scan early.
     """
     h, w = image.shape[:2]
 
@@ -279,6 +540,12 @@ def detect_card_contour(image, scan_step=1, color_tol=20, min_border_width_ratio
     # clamp offsets to image
     offsets = [o for o in offsets if abs(o) < min(h//2, w//2)]
 
+    # Reference colours of the outermost rows/cols, shared by every scan line
+    top_color = np.mean(image[0, :, :], axis=0)
+    bottom_color = np.mean(image[-1, :, :], axis=0)
+    left_color = np.mean(image[:, 0, :], axis=0)
+    right_color = np.mean(image[:, -1, :], axis=0)
+
     for o in offsets:
         # sample horizontal scan (for top/bottom) using column at mid_x + o
         col_x = np.clip(mid_x + o, 0, w-1)
@@ -294,39 +561,15 @@ def detect_card_contour(image, scan_step=1, color_tol=20, min_border_width_ratio
         # local helper scan that matches detect_outer_border logic for one column/row:
         def scan_col(col_x_inner):
             col = image[:, col_x_inner, :]
-            top_color = np.mean(image[0, :, :], axis=0)
-            bottom_color = np.mean(image[-1, :, :], axis=0)
-            # find first different pixel from top
-            top_idx = 0
-            for i in range(0, h, scan_step):
-                if np.linalg.norm(col[i] - top_color) > color_tol:
-                    top_idx = i
-                    break
-            # find first different pixel from bottom
-            bottom_idx = 0
-            for i in range(0, h, scan_step):
-                if np.linalg.norm(col[h-1-i] - bottom_color) > color_tol:
-                    bottom_idx = h-1-i
-                    break
-            # convert bottom_idx to distance from bottom
-            bottom_px = h - 1 - bottom_idx
+            top_idx = _first_crossing(col, top_color, scan_step, color_tol, min_run)
+            # bottom distance is found by scanning the reversed column
+            bottom_px = _first_crossing(col[::-1], bottom_color, scan_step, color_tol, min_run)
             return top_idx, bottom_px
 
         def scan_row(row_y_inner):
             row = image[row_y_inner, :, :]
-            left_color = np.mean(image[:, 0, :], axis=0)
-            right_color = np.mean(image[:, -1, :], axis=0)
-            left_idx = 0
-            for i in range(0, w, scan_step):
-                if np.linalg.norm(row[i] - left_color) > color_tol:
-                    left_idx = i
-                    break
-            right_idx = 0
-            for i in range(0, w, scan_step):
-                if np.linalg.norm(row[w-1-i] - right_color) > color_tol:
-                    right_idx = w-1-i
-                    break
-            right_px = w - 1 - right_idx
+            left_idx = _first_crossing(row, left_color, scan_step, color_tol, min_run)
+            right_px = _first_crossing(row[::-1], right_color, scan_step, color_tol, min_run)
             return left_idx, right_px
 
         t, b = scan_col(col_x)
@@ -361,12 +604,39 @@ def detect_card_contour(image, scan_step=1, color_tol=20, min_border_width_ratio
     # print(f"DEBUG wrapper contour pts: {contour_pts}")
     return contour_pts
 
+def is_fallback_contour(corners, image_shape, min_border_width_ratio=0.05):
+    """
+    True when detect_card_contour found no border on any side and returned
+    its whole-frame fallback (every side clamped to the minimum width),
+    i.e. there is no card in the image to measure.
+    """
+    h, w = image_shape[:2]
+    min_px = int(min(h, w) * min_border_width_ratio)
+    fallback = np.array([(min_px, min_px), (w - min_px - 1, min_px),
+                         (w - min_px - 1, h - min_px - 1), (min_px, h - min_px - 1)], dtype="float32")
+    return bool(np.array_equal(np.asarray(corners, dtype="float32"), fallback))
+
 # ---------- Inner Artwork ----------
-def detect_inner_artwork(card_img):
-    gray = cv2.cvtColor(card_img, cv2.COLOR_BGR2GRAY)
-    blur = cv2.GaussianBlur(gray, (5,5), 0)
-    th = cv2.adaptiveThreshold(blur, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                cv2.THRESH_BINARY_INV, 11, 2)
+def detect_inner_artwork(card_img, engine="contours", scale=1.0):
+    """
+    Returns the artwork box (x, y, w, h) inside a warped card, or None.
+
+    engine="contours" walks every external contour of the threshold mask in
+    Python. engine="components" uses connected-component statistics instead,
+    filtered with NumPy over the stats array, which stays fast on noisy art
+    with tens of thousands of blobs (about 230 ms against 270 ms on the 12 MP
+    reference scan). With scale < 1 the component search runs on a
+    downscaled mask and the winner is re-measured at full resolution; the
+    re-measurement covers most of the card, so this is slower than scale=1.0
+    and only useful when the full-size mask is too noisy to select from
+    (0.25 merges too much of the mask on large scans).
+    """
+    th = artwork_mask(card_img)
+    if engine == "components":
+        return inner_artwork_components(th, scale=scale)
+    if engine != "contours":
+        raise ValueError(f"Unknown inner artwork engine: {engine}")
+
     contours, _ = cv2.findContours(th, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     h, w = card_img.shape[:2]
     card_area = w * h
@@ -385,6 +655,212 @@ def detect_inner_artwork(card_img):
     _, x,y,ww,hh = candidates[0]
     return (x,y,ww,hh)
 
+def artwork_mask(card_img):
+    gray = cv2.cvtColor(card_img, cv2.COLOR_BGR2GRAY)
+    blur = cv2.GaussianBlur(gray, (5,5), 0)
+    return cv2.adaptiveThreshold(blur, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                 cv2.THRESH_BINARY_INV, 11, 2)
+
+def inner_artwork_components(th, scale=1.0):
+    """Connected-component version of the contour search in detect_inner_artwork."""
+    h, w = th.shape[:2]
+    if scale >= 1.0:
+        found = artwork_component(th, w, h)
+        return None if found is None else found[0]
+
+    small_w, small_h = max(1, int(w * scale)), max(1, int(h * scale))
+    small = cv2.resize(th, (small_w, small_h), interpolation=cv2.INTER_AREA)
+    _, small = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY)  # keep thin strokes connected
+    found = artwork_component(small, small_w, small_h)
+    if found is None:
+        return None
+
+    # Low-res blobs can merge neighbours that are separate at full size, so
+    # re-run the selection on the full-resolution mask around the winner only.
+    (x, y, ww, hh), _, _ = found
+    fx, fy = w / small_w, h / small_h
+    pad = int(np.ceil(max(fx, fy))) + 1
+    x0, y0 = max(0, int(x * fx) - pad), max(0, int(y * fy) - pad)
+    x1, y1 = min(w, int((x + ww) * fx) + pad), min(h, int((y + hh) * fy) + pad)
+    refined = artwork_component(th[y0:y1, x0:x1], w, h)
+    if refined is None:
+        return (int(x * fx), int(y * fy), int(ww * fx), int(hh * fy))
+    rx, ry, rw, rh = refined[0]
+    return (x0 + rx, y0 + ry, rw, rh)
+
+def artwork_component(th, card_w, card_h):
+    """
+    Picks the same blob detect_inner_artwork's contour loop would: the largest
+    external outline with 2-95% of the card area and a bounding box of at least
+    20% of the card in each direction. Returns (box, labels, label) or None.
+
+    Bounding-box size is a necessary condition for both tests (a contour never
+    encloses more than its box), so it is applied to the whole stats array at
+    once. The exact contour area, and whether the blob sits inside another
+    blob's hole (RETR_EXTERNAL would never report it), are only checked for the
+    handful of survivors.
+    """
+    card_area = card_w * card_h
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(th, connectivity=8)
+    bw = stats[1:, cv2.CC_STAT_WIDTH]
+    bh = stats[1:, cv2.CC_STAT_HEIGHT]
+    keep = (bw >= 0.2 * card_w) & (bh >= 0.2 * card_h) & (bw * bh >= 0.02 * card_area)
+    survivors = np.flatnonzero(keep) + 1
+    if survivors.size == 0:
+        return None
+
+    # Background regions (4-connected, the dual of 8-connected foreground) that
+    # touch the image edge are "outside"; any other background is a hole.
+    _, bg_labels = cv2.connectedComponents(cv2.bitwise_not(th), connectivity=4)
+    outside = set(np.unique(np.concatenate([bg_labels[0], bg_labels[-1],
+                                            bg_labels[:, 0], bg_labels[:, -1]])).tolist())
+    outside.discard(0)
+
+    candidates = []
+    for i in survivors:
+        x, y, ww, hh = stats[i, :4]
+        comp = (labels[y:y+hh, x:x+ww] == i).astype(np.uint8)
+        if x > 0:
+            # The pixel just left of the blob's leftmost column is background
+            # lying outside the blob; if that region is a hole, the blob is nested.
+            row = int(np.argmax(comp[:, 0]))
+            if bg_labels[y + row, x - 1] not in outside:
+                continue
+        comp = cv2.copyMakeBorder(comp, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+        contours, _ = cv2.findContours(comp, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        area = max(cv2.contourArea(c) for c in contours)
+        if area < 0.02 * card_area or area > 0.95 * card_area:
+            continue
+        candidates.append((area, (int(x), int(y), int(ww), int(hh)), int(i)))
+    if not candidates:
+        return None
+    candidates.sort(reverse=True, key=lambda x: x[0])
+    _, box, label = candidates[0]
+    return box, labels, label
+
+def compare_inner_artwork_engines(image_paths, scale=1.0):
+    """
+    Runs both artwork engines on each image's warped card and returns the
+    [(path, contours_box, components_box)] entries where they disagree.
+    """
+    mismatches = []
+    for path in image_paths:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        warped = four_point_transform(image, detect_card_contour(image))
+        by_contours = detect_inner_artwork(warped, engine="contours")
+        by_components = detect_inner_artwork(warped, engine="components", scale=scale)
+        if by_contours != by_components:
+            mismatches.append((path, by_contours, by_components))
+    return mismatches
+
+# ---------- Inner Frame (projection profiles) ----------
+def edge_profiles(card_img, band=(0.15, 0.85)):
+    """
+    Column and row edge-strength profiles of a card in one vectorized pass:
+    the mean absolute grey step across k pixels, averaged over the central
+    band of the other axis so corner rounding and rounded-off ends of the
+    frame do not count. k grows with resolution so the soft edges of large
+    scans still register. Returns (col_profile, row_profile, k).
+    """
+    gray = cv2.cvtColor(card_img, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    k = max(1, int(round(min(h, w) / 250)))
+    r0, r1 = int(h * band[0]), int(h * band[1])
+    c0, c1 = int(w * band[0]), int(w * band[1])
+    cols = cv2.reduce(cv2.absdiff(gray[r0:r1, k:], gray[r0:r1, :-k]), 0,
+                      cv2.REDUCE_AVG, dtype=cv2.CV_32F).ravel()
+    rows = cv2.reduce(cv2.absdiff(gray[k:, c0:c1], gray[:-k, c0:c1]), 1,
+                      cv2.REDUCE_AVG, dtype=cv2.CV_32F).ravel()
+    return cols, rows, k
+
+def _subpixel_peak(profile, i):
+    """Refines integer peak i with a parabola through its two neighbours."""
+    if 0 < i < len(profile) - 1:
+        a, b, c = profile[i-1], profile[i], profile[i+1]
+        denom = a - 2*b + c
+        if b >= a and b >= c and denom < 0:
+            return i + 0.5 * (a - c) / denom
+    return float(i)
+
+def _outermost_edge(profile, lo, hi, rel, min_contrast, from_end=False):
+    """
+    Sub-pixel position of the outermost edge in profile[lo:hi] that reaches
+    rel of the window's peak, searching inward from lo (or from hi when
+    from_end). None when the window holds no edge standing min_contrast times
+    above its median.
+    """
+    window = profile[lo:hi]
+    if window.size == 0 or window.max() < min_contrast * max(float(np.median(window)), 1e-3):
+        return None
+    strong = np.flatnonzero(window >= rel * window.max())
+    step = -1 if from_end else 1
+    i = lo + int(strong[-1] if from_end else strong[0])
+    while lo <= i + step < hi and profile[i + step] > profile[i]:
+        i += step   # climb to the top of this edge
+    return _subpixel_peak(profile, i)
+
+def inner_frame_profile(card_img, search=0.25, margin=0.015, rel=0.5, min_contrast=1.5,
+                        max_border_mm=8.0):
+    """
+    Returns the inner frame box (x, y, w, h) in sub-pixel float coordinates,
+    or None.
+
+    Each border is searched for in the outer `search` fraction of the card,
+    and no deeper than max_border_mm (wider than any border short of 90/10
+    centering), skipping the `margin` fraction at the very edge where warp
+    residue from the background lives. The frame edge is the outermost long
+    straight edge, so the outermost profile peak reaching rel of the
+    strongest one is taken rather than the strongest itself, which is
+    usually inside the artwork. The depth bound matters at the bottom, where
+    the attack and weakness rules of the text box are far stronger than the
+    frame edge below them.
+    """
+    h, w = card_img.shape[:2]
+    cols, rows, k = edge_profiles(card_img)
+    m_x = max(1, int(w * margin))
+    s_x = int(w * min(search, max_border_mm / CARD_WIDTH_MM))
+    m_y = max(1, int(h * margin))
+    s_y = int(h * min(search, max_border_mm / CARD_HEIGHT_MM))
+
+    left = _outermost_edge(cols, m_x, s_x, rel, min_contrast)
+    right = _outermost_edge(cols, len(cols) - s_x, len(cols) - m_x, rel, min_contrast, from_end=True)
+    top = _outermost_edge(rows, m_y, s_y, rel, min_contrast)
+    bottom = _outermost_edge(rows, len(rows) - s_y, len(rows) - m_y, rel, min_contrast, from_end=True)
+    if left is None or right is None or top is None or bottom is None:
+        return None
+
+    # Profile index i measures the step between pixels i and i + k
+    x0, x1 = float(left) + k / 2.0, float(right) + k / 2.0
+    y0, y1 = float(top) + k / 2.0, float(bottom) + k / 2.0
+    return (x0, y0, x1 - x0, y1 - y0)
+
+def compare_centering_engines(image_paths):
+    """
+    Measures each image's borders with both centering engines. Returns one
+    entry per readable image with both sets of raw mm values, the resulting
+    centering grades, and the time each engine took.
+    """
+    rows = []
+    for path in image_paths:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        warped = four_point_transform(image, detect_card_contour(image))
+        entry = {"path": path}
+        for engine in ("artwork", "profile"):
+            start = time.perf_counter()
+            borders = measure_border_mm(warped, centering_engine=engine)
+            borders["seconds"] = time.perf_counter() - start
+            borders["centering_h"] = mm_to_center_decimal(abs(borders["left_mm"] - borders["right_mm"]))
+            borders["centering_v"] = mm_to_center_decimal(abs(borders["top_mm"] - borders["bottom_mm"]))
+            entry[engine] = borders
+        entry["agree"] = (entry["artwork"]["centering_h"] == entry["profile"]["centering_h"] and
+                          entry["artwork"]["centering_v"] == entry["profile"]["centering_v"])
+        rows.append(entry)
+    return rows
+
 def fallback_inner_box(w, h):
     return (int(w*0.1), int(h*0.1), int(w*0.8), int(h*0.8))
 
@@ -411,7 +887,7 @@ def ratio_to_psa_label(ratio):
         return 0.90
 
 # ---------- Surface and Corner Scoring ----------
-def compute_surface_score(card_img):
+def compute_surface_score(card_img, canny_low=SURFACE_CANNY[0], canny_high=SURFACE_CANNY[1]):
     gray = cv2.cvtColor(card_img, cv2.COLOR_BGR2GRAY)
     blur = cv2.GaussianBlur(gray, (5,5), 0)
 
@@ -420,14 +896,14 @@ def compute_surface_score(card_img):
     kernel = np.ones((3,3), np.uint8)
     th = cv2.morphologyEx(th, cv2.MORPH_OPEN, kernel)
 
-    edges = cv2.Canny(th, 60, 180)
+    edges = cv2.Canny(th, canny_low, canny_high)
     damage_ratio = np.count_nonzero(edges > 0) / edges.size
     score = max(0.0, min(10.0, 10.0 * (1 - damage_ratio * 2.5)))
 
     # print(f"Surface debug: damage_ratio={damage_ratio:.4f}, score={score:.1f}")
     return round(score, 1)
 
-def compute_corners_score(card_img, border_px=20):
+def compute_corners_score(card_img, border_px=CORNER_BORDER_PX):
     h, w = card_img.shape[:2]
     corners_score = []
     debug_info = {}
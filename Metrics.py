@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import bisect
+import threading
+
+# ---------- Outcomes ----------
+# Exactly one outcome per graded image
+SUCCESS = "success"
+UNREADABLE = "unreadable"
+NO_CONTOUR = "no_contour"
+ERROR = "error"
+QUALITY_REJECTED = "quality_rejected"
+OUTCOMES = (SUCCESS, UNREADABLE, NO_CONTOUR, ERROR, QUALITY_REJECTED)
+
+# Flags a successful measurement can carry (any number per image)
+FALLBACK_INNER_BOX = "fallback_inner_box"
+CLAMPED_MARGINS = "clamped_margins"
+FLAGS = (FALLBACK_INNER_BOX, CLAMPED_MARGINS)
+
+# Upper bucket bounds in seconds, roughly doubling from 1 ms to ~1 min
+LATENCY_BUCKETS = tuple(round(0.001 * 2 ** i, 6) for i in range(17))
+
+
+# ---------- Latency Histogram ----------
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last bucket is overflow
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, q):
+        if not self.count:
+            return None
+        target = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def summary(self):
+        buckets = {f"<={b}": n for b, n in zip(self.bounds, self.counts) if n}
+        if self.counts[-1]:
+            buckets[f">{self.bounds[-1]}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_seconds": round(self.total / self.count, 6) if self.count else None,
+            "min_seconds": self.min,
+            "max_seconds": self.max,
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95),
+            "p99_seconds": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+# ---------- Grading Metrics ----------
+class GradingMetrics:
+    """
+    Outcome counters, per-stage latency histograms and flag counters for a
+    grading run. Thread-safe, so pipeline stages can report concurrently.
+
+    Hooks are callables taking one event dict; they are called for every
+    recorded image, e.g. {"path", "outcome", "error", "seconds"}.
+    print_event reproduces the console messages of the batch path.
+    """
+
+    def __init__(self, run_name=None, hooks=()):
+        self.run_name = run_name
+        self.hooks = list(hooks)
+        self.started = time.time()
+        self.outcomes = {o: 0 for o in OUTCOMES}
+        self.flags = {f: 0 for f in FLAGS}
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def observe(self, stage, seconds):
+        """Adds one latency sample for a pipeline stage."""
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = LatencyHistogram()
+            hist.observe(seconds)
+
+    def flag(self, name):
+        """Counts a condition met while measuring, e.g. FALLBACK_INNER_BOX."""
+        with self._lock:
+            self.flags[name] = self.flags.get(name, 0) + 1
+
+    def record(self, path, outcome, error=None, seconds=None, **extra):
+        """Counts one image's outcome and notifies the hooks."""
+        if outcome not in self.outcomes:
+            raise ValueError(f"Unknown outcome: {outcome}")
+        with self._lock:
+            self.outcomes[outcome] += 1
+        event = {"path": path, "outcome": outcome, "error": error, "seconds": seconds}
+        event.update(extra)
+        for hook in self.hooks:
+            hook(event)
+        return event
+
+    def summary(self):
+        with self._lock:
+            total = sum(self.outcomes.values())
+            return {
+                "run": self.run_name,
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "wall_seconds": round(time.time() - self.started, 3),
+                "images": total,
+                "outcomes": dict(self.outcomes),
+                "success_rate": round(self.outcomes[SUCCESS] / total, 4) if total else None,
+                "flags": dict(self.flags),
+                "stages": {name: hist.summary() for name, hist in self.stages.items()},
+            }
+
+    def write_summary(self, path):
+        """Writes summary() as JSON and returns it."""
+        summary = self.summary()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+
+# ---------- Hooks ----------
+def print_event(event):
+    """Console hook matching the messages the batch path has always printed."""
+    fname = os.path.basename(event["path"])
+    outcome = event["outcome"]
+    if outcome == SUCCESS:
+        print(f"Processed: {fname}")
+    elif outcome == UNREADABLE:
+        print(f"Skipping unreadable: {fname}")
+    elif outcome == NO_CONTOUR:
+        print(f"No contour found: {fname}")
+    elif outcome == QUALITY_REJECTED:
+        print(f"Quality reject: {fname} {','.join(event.get('reasons', []))}")
+    else:
+        print(f"Error processing {fname}: {event['error']}")
+        if event.get("traceback"):
+            print(event["traceback"], end="")
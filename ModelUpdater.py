@@ -0,0 +1,224 @@
+import os
+import csv
+import json
+import time
+import uuid
+import pickle
+import hashlib
+
+import numpy as np
+
+from paths import resource_path
+from ReferenceLibrary import parse_grade_from_filename
+
+# ---------- Constants ----------
+MODEL_FILE = "trained_model.pkl"
+VERSIONS_DIR = "model_versions"
+BASE_BATCH = "base"
+DEFAULT_NEW_TREES = 20
+
+
+# ---------- Training Data ----------
+def row_id(filename, values):
+    """
+    Id of one training row: its filename plus a hash of its measurements.
+    Filenames follow <grade>PSA_<card>.png, so a new slab of the same card
+    and grade shares the filename but not the measurements.
+    """
+    content = ",".join([filename] + [repr(float(v)) for v in values])
+    return f"{filename}#{hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()}"
+
+
+def load_training_data(csv_path):
+    """
+    Reads a trainingData.txt-style CSV (filename, surface, corners,
+    centering_h, centering_v; no header needed). The grade comes from the
+    filename; row ids come from row_id. Rows without a graded filename are
+    skipped. Returns (ids, X, y).
+    """
+    ids, X, y = [], [], []
+    with open(csv_path, newline="", encoding="utf-8") as fin:
+        for row in csv.reader(fin):
+            if len(row) < 5:
+                continue
+            grade = parse_grade_from_filename(row[0])
+            if grade is None:
+                continue  # header row or ungraded scan
+            values = [float(v) for v in row[1:5]]
+            ids.append(row_id(row[0], values))
+            X.append(values)
+            y.append(grade)
+    return ids, np.array(X, dtype=float).reshape(-1, 4), np.array(y, dtype=float)
+
+
+# ---------- Manifest ----------
+def manifest_path(model_file):
+    """Sidecar manifest of a model file: trained_model.pkl -> trained_model.manifest.json."""
+    return os.path.splitext(model_file)[0] + ".manifest.json"
+
+
+def base_manifest(model, row_ids):
+    """
+    Manifest for a model trained from scratch (e.g. the shipped one): every
+    tree is attributed to a single "base" batch of row_ids.
+    """
+    return {
+        "version": 0,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "batches": {BASE_BATCH: {"rows": list(row_ids), "added": None}},
+        "trees": [{"batch": BASE_BATCH, "seed": tree.random_state} for tree in model.estimators_],
+    }
+
+
+def load_manifest(model_file, model=None, base_rows=()):
+    """
+    The manifest saved next to model_file. Without one, a base manifest is
+    started for model from base_rows (the rows the model was trained on).
+    """
+    path = manifest_path(model_file)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    if model is None:
+        raise FileNotFoundError(f"No manifest at {path}")
+    return base_manifest(model, base_rows)
+
+
+def seen_rows(manifest):
+    """Row ids seen by at least one tree still in the forest."""
+    return {row for batch in manifest["batches"].values() for row in batch["rows"]}
+
+
+# ---------- Incremental Update ----------
+def update_forest(model, manifest, ids, X, y, n_trees=DEFAULT_NEW_TREES, max_trees=None,
+                  batch_name=None, skip_seen=True):
+    """
+    Adds n_trees trees fitted on the new rows only (scikit-learn warm start),
+    so the cost depends on the new data rather than the full history. With
+    max_trees, the oldest trees are retired until the forest fits.
+
+    Warm-start tree seeds follow from random_state and the current tree
+    count, which repeats once trees are retired, so every batch is grown
+    from a freshly drawn random_state, recorded in its manifest entry.
+
+    Rows whose id the manifest has already seen are skipped, so the whole,
+    grown training file can be passed in. batch_name defaults to a unique
+    timestamped name; rows given under an existing batch name join that
+    batch. model and manifest are updated in place; returns a summary dict
+    ("added" is 0 when there was nothing new).
+    """
+    if skip_seen:
+        seen = seen_rows(manifest)
+        keep = [i for i, row in enumerate(ids) if row not in seen]
+        ids, X, y = [ids[i] for i in keep], X[keep], y[keep]
+    if not ids:
+        return {"added": 0, "retired": 0, "trees": len(model.estimators_), "rows": 0}
+
+    batch_name = batch_name or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    before = len(model.estimators_)
+    seed = int(np.random.SeedSequence().generate_state(1)[0])
+    model.set_params(warm_start=True, n_estimators=before + n_trees, random_state=seed)
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+
+    batch = manifest["batches"].setdefault(batch_name, {"rows": []})
+    known = set(batch["rows"])
+    batch["rows"].extend(row for row in ids if row not in known)
+    batch["added"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    batch.setdefault("seeds", []).append(seed)
+    manifest["trees"].extend({"batch": batch_name, "seed": tree.random_state}
+                             for tree in model.estimators_[before:])
+
+    retired = 0
+    if max_trees is not None and len(model.estimators_) > max_trees:
+        retired = len(model.estimators_) - max_trees
+        model.estimators_ = model.estimators_[retired:]
+        model.set_params(n_estimators=len(model.estimators_))
+        manifest["trees"] = manifest["trees"][retired:]
+        # Batches no tree has seen any more are forgotten
+        live = {t["batch"] for t in manifest["trees"]}
+        manifest["batches"] = {name: b for name, b in manifest["batches"].items() if name in live}
+
+    return {"added": n_trees, "retired": retired, "trees": len(model.estimators_),
+            "rows": len(ids), "batch": batch_name}
+
+
+# ---------- Versioned Save ----------
+def _atomic_write(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_version(model, manifest, model_file=None, versions_dir=None):
+    """
+    Saves model + manifest as the next version under versions_dir and then
+    swaps them in as model_file. Every write goes to a temporary file that
+    is renamed into place, so a grader loading the model at the same time
+    sees either the old or the new version, never a partial file; graders
+    already running keep their loaded model until they call
+    Scikit_Learn_Model.reload_model(). Returns the versioned model path.
+    """
+    model_file = model_file or resource_path(MODEL_FILE)
+    versions_dir = versions_dir or os.path.join(os.path.dirname(os.path.abspath(model_file)),
+                                                VERSIONS_DIR)
+    os.makedirs(versions_dir, exist_ok=True)
+
+    manifest["version"] = manifest.get("version", 0) + 1
+    manifest["created"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    stem = os.path.splitext(os.path.basename(model_file))[0]
+    version_file = os.path.join(versions_dir, f"{stem}.v{manifest['version']}.pkl")
+
+    model_bytes = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    manifest_bytes = json.dumps(manifest, indent=1).encode("utf-8")
+    _atomic_write(version_file, model_bytes)
+    _atomic_write(manifest_path(version_file), manifest_bytes)
+    _atomic_write(model_file, model_bytes)
+    _atomic_write(manifest_path(model_file), manifest_bytes)
+    return version_file
+
+
+def update_from_csv(csv_path, model_file=None, n_trees=DEFAULT_NEW_TREES, max_trees=None,
+                    base_training_file=None):
+    """
+    One update step: load the current model and manifest, fit new trees on
+    the rows of csv_path not seen before and save the result as a new
+    version. base_training_file names the rows of a model that has no
+    manifest yet (defaults to the bundled trainingData.txt).
+    """
+    model_file = model_file or resource_path(MODEL_FILE)
+    with open(model_file, "rb") as f:
+        model = pickle.load(f)   # a private copy; graders' cached model is untouched
+
+    base_rows = ()
+    if not os.path.exists(manifest_path(model_file)):
+        base_rows, _, _ = load_training_data(base_training_file or resource_path("trainingData.txt"))
+    manifest = load_manifest(model_file, model, base_rows)
+
+    ids, X, y = load_training_data(csv_path)
+    start = time.perf_counter()
+    summary = update_forest(model, manifest, ids, X, y, n_trees=n_trees, max_trees=max_trees)
+    summary["fit_seconds"] = round(time.perf_counter() - start, 3)
+    if summary["added"]:
+        summary["saved"] = save_version(model, manifest, model_file)
+        summary["version"] = manifest["version"]
+    return summary
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: python ModelUpdater.py <new rows csv> [trees to add] [max trees]")
+        sys.exit(1)
+    n_trees = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_NEW_TREES
+    max_trees = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    result = update_from_csv(sys.argv[1], n_trees=n_trees, max_trees=max_trees)
+    if result["added"]:
+        print(f"Added {result['added']} trees on {result['rows']} new rows "
+              f"({result['fit_seconds']}s), retired {result['retired']}; "
+              f"{result['trees']} trees saved as version {result['version']}: {result['saved']}")
+    else:
+        print("No new rows; model unchanged.")
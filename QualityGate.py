@@ -0,0 +1,216 @@
+import time
+import cv2
+import numpy as np
+
+# ---------- Constants ----------
+THUMB_LONG_SIDE = 400     # framing, contrast and exposure checks run at this size
+FOCUS_LONG_SIDE = 800     # focus needs a little more detail
+
+# Reason codes (stable strings, safe to store or aggregate)
+UNREADABLE = "UNREADABLE"
+BLURRY = "BLURRY"
+OVEREXPOSED = "OVEREXPOSED"
+UNDEREXPOSED = "UNDEREXPOSED"
+CARD_TOO_SMALL = "CARD_TOO_SMALL"
+CARD_CROPPED = "CARD_CROPPED"
+LOW_BACKGROUND_CONTRAST = "LOW_BACKGROUND_CONTRAST"
+
+# Reduced decodes, mildest first. Only JPEG decodes straight to these sizes
+# (DCT scaling); other formats decode at full size and are resized after.
+REDUCED_FLAGS = ((2, cv2.IMREAD_REDUCED_COLOR_2),
+                 (4, cv2.IMREAD_REDUCED_COLOR_4),
+                 (8, cv2.IMREAD_REDUCED_COLOR_8))
+
+
+# ---------- Image Headers ----------
+def read_image_info(path):
+    """
+    {"size": (width, height), "jpeg": bool} from the file header without
+    decoding pixels, or None when the header cannot be read.
+    """
+    from PIL import Image   # deferred; PIL is not needed until a file is checked
+    try:
+        with Image.open(path) as img:   # lazy: only the header is parsed
+            return {"size": img.size, "jpeg": img.format == "JPEG"}
+    except Exception:
+        return None
+
+
+def read_image_size(path):
+    """(width, height) from the file header without decoding pixels, or None."""
+    info = read_image_info(path)
+    return None if info is None else info["size"]
+
+
+def reduced_flag(info, long_side):
+    """
+    The imread flag for the strongest JPEG reduction whose decode still
+    covers long_side, from read_image_info output. IMREAD_COLOR for other
+    formats, whose codecs ignore the reduction.
+    """
+    if info is None or not info["jpeg"]:
+        return cv2.IMREAD_COLOR
+    longest = max(info["size"])
+    for factor, flag in reversed(REDUCED_FLAGS):
+        if -(-longest // factor) >= long_side:   # JPEG rounds reduced sizes up
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def load_reduced(image_or_path, long_side):
+    """
+    BGR copy of the image no longer than long_side. A path is decoded once:
+    JPEGs with the strongest reduction that still covers long_side, so
+    full-size pixels are never decoded; other formats at full size, then
+    resized.
+    """
+    image = image_or_path
+    if isinstance(image_or_path, str):
+        image = cv2.imread(image_or_path, reduced_flag(read_image_info(image_or_path), long_side))
+        if image is None:
+            return None
+
+    h, w = image.shape[:2]
+    scale = long_side / max(h, w)
+    if scale < 1.0:
+        image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+    return image
+
+
+def _extent(fraction):
+    """First and last index where a row/column profile exceeds half its peak."""
+    if fraction.max() <= 0:
+        return None
+    idx = np.flatnonzero(fraction > 0.5 * fraction.max())
+    return int(idx[0]), int(idx[-1])
+
+
+# ---------- Quality Assessment ----------
+def assess_image_quality(image_or_path,
+                         min_focus=100.0,
+                         max_clipped=0.25,
+                         min_brightness=40.0,
+                         min_card_fraction=0.2,
+                         edge_margin=0.01,
+                         min_background_contrast=40.0,
+                         color_tol=20):
+    """
+    Cheap pre-check run before process_single_card. Returns:
+
+      {"ok": bool, "reasons": [reason codes], "metrics": {...}, "seconds": float}
+
+    - framing:  pixels further than color_tol from the frame-edge colour are
+                card; the card must cover min_card_fraction of the frame
+                (CARD_TOO_SMALL). A card within edge_margin of every frame
+                edge is a tight crop, the style trainingData.txt was built
+                from, which detect_card_contour measures as the whole frame;
+                one that reaches some edges but leaves background at others
+                runs off the frame and no contour fits it (CARD_CROPPED)
+    - contrast: colour distance between the background and the card's own
+                outer border, which is the step detect_card_contour scans for
+                (LOW_BACKGROUND_CONTRAST; not checked on tight crops, which
+                have no background)
+    - exposure: share of blown-out pixels and mean brightness of the card
+                (OVEREXPOSED / UNDEREXPOSED)
+    - focus:    variance of the Laplacian over the middle of the card, on a
+                larger FOCUS_LONG_SIDE copy so fine blur is still visible (BLURRY)
+    """
+    start = time.perf_counter()
+    focus_img = load_reduced(image_or_path, FOCUS_LONG_SIDE)
+    if focus_img is None:
+        return {"ok": False, "reasons": [UNREADABLE], "metrics": {},
+                "seconds": time.perf_counter() - start}
+    thumb = load_reduced(focus_img, THUMB_LONG_SIDE)
+    h, w = thumb.shape[:2]
+    reasons = []
+
+    # Background colour from the outermost ring, as detect_card_contour does
+    ring = 2
+    sides = [thumb[:ring].reshape(-1, 3), thumb[-ring:].reshape(-1, 3),
+             thumb[:, :ring].reshape(-1, 3), thumb[:, -ring:].reshape(-1, 3)]
+    background = np.median(np.concatenate(sides), axis=0)
+
+    card_mask = np.linalg.norm(thumb.astype(np.float32) - background, axis=2) > color_tol
+    rows = _extent(card_mask.mean(axis=1))
+    cols = _extent(card_mask.mean(axis=0))
+    if rows is None or cols is None:
+        top, bottom, left, right = 0, h - 1, 0, w - 1
+        card_fraction = 0.0
+    else:
+        (top, bottom), (left, right) = rows, cols
+        card_fraction = (bottom - top + 1) * (right - left + 1) / float(h * w)
+    card = thumb[top:bottom + 1, left:right + 1]
+
+    touch = max(1, int(round(edge_margin * max(h, w))))
+    touching = [top < touch, left < touch, h - 1 - bottom < touch, w - 1 - right < touch]
+    tight_crop = all(touching)
+
+    strip = max(1, min(card.shape[:2]) // 50)
+    card_edge = np.concatenate([card[:strip].reshape(-1, 3), card[-strip:].reshape(-1, 3),
+                                card[:, :strip].reshape(-1, 3), card[:, -strip:].reshape(-1, 3)])
+    contrast = float(np.linalg.norm(np.median(card_edge, axis=0) - background))
+
+    gray = cv2.cvtColor(card, cv2.COLOR_BGR2GRAY)
+    clipped = float(np.count_nonzero(gray >= 250)) / gray.size
+    brightness = float(gray.mean())
+
+    # Focus on the central half of the card in the larger copy
+    fy, fx = focus_img.shape[0] / h, focus_img.shape[1] / w
+    cy0, cy1 = int((top + (bottom - top) * 0.25) * fy), int((top + (bottom - top) * 0.75) * fy)
+    cx0, cx1 = int((left + (right - left) * 0.25) * fx), int((left + (right - left) * 0.75) * fx)
+    focus_gray = cv2.cvtColor(focus_img[cy0:cy1 + 1, cx0:cx1 + 1], cv2.COLOR_BGR2GRAY)
+    focus = float(cv2.Laplacian(focus_gray, cv2.CV_64F).var())
+
+    if focus < min_focus:
+        reasons.append(BLURRY)
+    if clipped > max_clipped:
+        reasons.append(OVEREXPOSED)
+    if brightness < min_brightness:
+        reasons.append(UNDEREXPOSED)
+    if card_fraction < min_card_fraction:
+        reasons.append(CARD_TOO_SMALL)
+    if any(touching) and not tight_crop:
+        reasons.append(CARD_CROPPED)
+    if contrast < min_background_contrast and not tight_crop:
+        reasons.append(LOW_BACKGROUND_CONTRAST)
+
+    return {
+        "ok": not reasons,
+        "reasons": reasons,
+        "metrics": {
+            "focus": round(focus, 1),
+            "clipped_fraction": round(clipped, 3),
+            "brightness": round(brightness, 1),
+            "card_fraction": round(card_fraction, 3),
+            "edges_touched": sum(touching),
+            "background_contrast": round(contrast, 1),
+        },
+        "seconds": time.perf_counter() - start,
+    }
+
+
+# ---------- Batch Accounting ----------
+class QualityTally:
+    """Counts checked / rejected images and how often each reason fired."""
+
+    def __init__(self):
+        self.checked = 0
+        self.rejected = 0
+        self.reasons = {}
+
+    def add(self, report):
+        self.checked += 1
+        if not report["ok"]:
+            self.rejected += 1
+        for reason in report["reasons"]:
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def summary(self):
+        rate = self.rejected / self.checked if self.checked else 0.0
+        return {
+            "checked": self.checked,
+            "rejected": self.rejected,
+            "reject_rate": round(rate, 3),
+            "reasons": dict(sorted(self.reasons.items(), key=lambda kv: -kv[1])),
+        }
@@ -0,0 +1,198 @@
+import os
+import csv
+import numpy as np
+import cv2
+from sklearn.neighbors import KDTree, BallTree
+
+from paths import resource_path
+
+# ---------- Constants ----------
+# Centering decimals live in 0.55-0.90 while surface/corners live in 0-10,
+# so centering is up-weighted to carry a comparable share of the distance.
+FEATURE_WEIGHTS = np.array([1.0, 1.0, 10.0, 10.0])
+DESCRIPTOR_GRID = 4
+DESCRIPTOR_WEIGHT = 5.0
+DEFAULT_LIBRARY_PATH = "referenceLibrary.npz"
+
+
+def parse_grade_from_filename(filename):
+    """
+    Graded scans are named "<grade>PSA_<card>.<ext>", e.g. "8.5PSA_Charizard.png".
+    Returns the grade as a float, or None when the name does not follow that pattern.
+    """
+    prefix = os.path.basename(filename).split("PSA", 1)[0]
+    try:
+        return float(prefix)
+    except ValueError:
+        return None
+
+
+def compute_image_descriptor(card_img, grid=DESCRIPTOR_GRID):
+    """
+    Compact appearance descriptor for a warped card: mean grey level over a
+    grid x grid layout, scaled to 0-1. Cheap enough to compute at ingest time.
+    """
+    gray = cv2.cvtColor(card_img, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (grid, grid), interpolation=cv2.INTER_AREA)
+    return small.astype(np.float64).ravel() / 255.0
+
+
+# ---------- Reference Library ----------
+class ReferenceLibrary:
+    """
+    Nearest-neighbour index over graded reference cards.
+
+    Each entry is (image path, grade, measurement vector[, image descriptor]).
+    Bulk entries live in a KD-tree (or a ball-tree once descriptors make the
+    vectors high dimensional). Additions go into a small pending buffer that is
+    searched by brute force, so new cards are queryable immediately; the buffer
+    is only folded into the tree once it grows past merge_threshold.
+    """
+
+    def __init__(self, use_descriptor=False, leaf_size=40, merge_threshold=256):
+        self.use_descriptor = use_descriptor
+        self.leaf_size = leaf_size
+        self.merge_threshold = merge_threshold
+
+        self.paths = []
+        self.grades = []
+        self._vectors = []        # weighted vectors, same order as paths/grades
+        self._tree = None
+        self._tree_size = 0       # entries [0, _tree_size) are in the tree
+        self._pending = None      # cached array of entries [_tree_size, len)
+
+    def __len__(self):
+        return len(self.paths)
+
+    # ---------- Building ----------
+    def _make_vector(self, measurements, descriptor=None):
+        m = np.asarray(measurements, dtype=np.float64).ravel()
+        if m.shape[0] != 4:
+            raise ValueError("Measurements must be (surface, corners, centering_h, centering_v).")
+        vec = m * FEATURE_WEIGHTS
+        if self.use_descriptor:
+            if descriptor is None:
+                raise ValueError("This library indexes image descriptors; one is required.")
+            vec = np.concatenate([vec, np.asarray(descriptor, dtype=np.float64).ravel() * DESCRIPTOR_WEIGHT])
+        return vec
+
+    def add(self, path, grade, measurements, descriptor=None):
+        self.paths.append(path)
+        self.grades.append(float(grade))
+        self._vectors.append(self._make_vector(measurements, descriptor))
+        self._pending = None
+
+        if len(self) - self._tree_size >= self.merge_threshold:
+            self.rebuild()
+
+    def add_many(self, entries):
+        """entries: iterable of (path, grade, measurements) or (path, grade, measurements, descriptor)."""
+        for entry in entries:
+            self.add(*entry)
+
+    def rebuild(self):
+        """Fold every entry (including the pending buffer) into a fresh tree."""
+        if not self._vectors:
+            self._tree = None
+            self._tree_size = 0
+            return
+        data = np.vstack(self._vectors)
+        tree_cls = BallTree if self.use_descriptor else KDTree
+        self._tree = tree_cls(data, leaf_size=self.leaf_size)
+        self._tree_size = len(self._vectors)
+        self._pending = None
+
+    # ---------- Querying ----------
+    def query(self, measurements, k=5, descriptor=None):
+        """
+        Returns up to k nearest reference cards, closest first, as dicts:
+        {"path", "grade", "distance"}.
+        """
+        if not self.paths:
+            return []
+
+        q = self._make_vector(measurements, descriptor)
+        k = min(k, len(self))
+        dists, idxs = [], []
+
+        if self._tree is not None:
+            d, i = self._tree.query(q.reshape(1, -1), k=min(k, self._tree_size))
+            dists.extend(d[0])
+            idxs.extend(i[0])
+
+        if self._tree_size < len(self):
+            if self._pending is None:
+                self._pending = np.vstack(self._vectors[self._tree_size:])
+            d = np.sqrt(((self._pending - q) ** 2).sum(axis=1))
+            take = np.argsort(d)[:k]
+            dists.extend(d[take])
+            idxs.extend(take + self._tree_size)
+
+        order = np.argsort(dists)[:k]
+        return [
+            {
+                "path": self.paths[idxs[j]],
+                "grade": self.grades[idxs[j]],
+                "distance": float(dists[j]),
+            }
+            for j in order
+        ]
+
+    # ---------- Persistence ----------
+    def save(self, path):
+        vectors = np.vstack(self._vectors) if self._vectors else np.zeros((0, 4))
+        np.savez_compressed(
+            path,
+            paths=np.array(self.paths, dtype=str),
+            grades=np.array(self.grades, dtype=np.float64),
+            vectors=vectors,
+            use_descriptor=np.array(self.use_descriptor),
+        )
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        data = np.load(path, allow_pickle=False)
+        lib = cls(use_descriptor=bool(data["use_descriptor"]), **kwargs)
+        lib.paths = [str(p) for p in data["paths"]]
+        lib.grades = [float(g) for g in data["grades"]]
+        lib._vectors = list(data["vectors"])
+        lib.rebuild()
+        return lib
+
+    @classmethod
+    def from_training_file(cls, csv_path, image_dir, **kwargs):
+        """
+        Build a measurement-only library from a trainingData.txt-style CSV
+        (filename, surface, corners, centering_h, centering_v). The grade is
+        taken from the filename and rows without one are skipped.
+        """
+        lib = cls(use_descriptor=False, **kwargs)
+        with open(csv_path, newline="", encoding="utf-8") as fin:
+            for row in csv.reader(fin):
+                if len(row) < 5:
+                    continue
+                grade = parse_grade_from_filename(row[0])
+                if grade is None:
+                    continue  # header row or ungraded scan
+                lib.paths.append(os.path.join(image_dir, row[0]))
+                lib.grades.append(grade)
+                lib._vectors.append(lib._make_vector([float(v) for v in row[1:5]]))
+        lib.rebuild()
+        return lib
+
+
+def load_default_library():
+    """Returns the bundled reference library, or None if it has not been built."""
+    lib_path = resource_path(DEFAULT_LIBRARY_PATH)
+    if not os.path.exists(lib_path):
+        return None
+    return ReferenceLibrary.load(lib_path)
+
+
+if __name__ == "__main__":
+    # Build the bundled library from the training measurements:
+    training_file = resource_path("trainingData.txt")
+    images_folder = resource_path(os.path.join("PSA Cards"))
+    library = ReferenceLibrary.from_training_file(training_file, images_folder)
+    library.save(resource_path(DEFAULT_LIBRARY_PATH))
+    print(f"Indexed {len(library)} reference cards.")
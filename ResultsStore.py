@@ -0,0 +1,221 @@
+import os
+import csv
+import time
+import sqlite3
+import threading
+
+from MeasurementCalculator import CSV_HEADER, measurement_row
+
+# ---------- Constants ----------
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".ai_pokemon_grader", "results.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id          INTEGER PRIMARY KEY,
+    graded_at   REAL NOT NULL,
+    filename    TEXT NOT NULL,
+    card_name   TEXT COLLATE NOCASE,
+    grade       REAL,
+    surface     REAL NOT NULL,
+    corners     REAL NOT NULL,
+    centering_h REAL NOT NULL,
+    centering_v REAL NOT NULL,
+    source      TEXT,
+    run         TEXT,
+    path        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_grade ON results (grade);
+CREATE INDEX IF NOT EXISTS idx_results_card ON results (card_name, grade);
+CREATE INDEX IF NOT EXISTS idx_results_graded_at ON results (graded_at);
+"""
+
+COLUMNS = ("graded_at", "filename", "card_name", "grade", "surface", "corners",
+           "centering_h", "centering_v", "source", "run", "path")
+
+
+def card_name_from_filename(filename):
+    """
+    "8.5PSA_Charizard.png" -> "Charizard"; names without the graded prefix
+    keep their whole stem.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    head, sep, tail = stem.partition("PSA_")
+    return tail if sep and head.replace(".", "", 1).isdigit() else stem
+
+
+# ---------- Store ----------
+class ResultsStore:
+    """
+    Grading history in SQLite (WAL mode, so readers never block the writer).
+
+    A result is a dict with the measurement keys (surface, corners,
+    centering_h, centering_v) plus optional "path" or "filename",
+    "predicted_grade" (or "grade"), "card_name", "graded_at" (epoch seconds),
+    "source" and "run". Missing card names are derived from the filename.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints under WAL
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.execute("PRAGMA optimize")  # refresh planner statistics if stale
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Writing ---
+    @staticmethod
+    def _row(result, now):
+        path = result.get("path")
+        filename = result.get("filename") or (os.path.basename(path) if path else "")
+        grade = result.get("predicted_grade", result.get("grade"))
+        return (
+            result.get("graded_at", now),
+            filename,
+            result.get("card_name") or card_name_from_filename(filename),
+            None if grade is None else float(grade),
+            float(result["surface"]),
+            float(result["corners"]),
+            float(result["centering_h"]),
+            float(result["centering_v"]),
+            result.get("source"),
+            result.get("run"),
+            path,
+        )
+
+    def add(self, result):
+        """Stores one result and returns its id."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                self._row(result, time.time()))
+            return cur.lastrowid
+
+    def add_many(self, results, source=None, run=None):
+        """
+        Stores results in a single transaction and returns how many were
+        written. source/run fill in results that do not set their own.
+        """
+        now = time.time()
+        rows = []
+        for r in results:
+            if source is not None or run is not None:
+                r = dict(r)
+                r.setdefault("source", source)
+                r.setdefault("run", run)
+            rows.append(self._row(r, now))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows)
+        return len(rows)
+
+    def add_measurements(self, measured, source="batch", run=None, predict=True):
+        """
+        Stores [(path, measurement)] pairs from a batch run in one transaction.
+        With predict=True the grades are filled in by a single batched
+        prediction first. Returns rows written.
+        """
+        measured = list(measured)
+        if not measured:
+            return 0
+        if predict:
+            from Scikit_Learn_Model import predict_card_grades   # loads the model
+            results = predict_card_grades([m for _, m in measured])
+        else:
+            results = [dict(m) for _, m in measured]
+        for (path, _), r in zip(measured, results):
+            r["path"] = path
+        return self.add_many(results, source=source, run=run)
+
+    # --- Reading ---
+    @staticmethod
+    def _where(min_grade=None, max_grade=None, card=None, since=None, until=None,
+               min_surface=None, min_corners=None, max_centering_h=None, max_centering_v=None,
+               source=None, run=None):
+        clauses, params = [], []
+        for sql, value in (("grade >= ?", min_grade), ("grade <= ?", max_grade),
+                           ("card_name = ?", card),
+                           ("graded_at >= ?", since), ("graded_at < ?", until),
+                           ("surface >= ?", min_surface), ("corners >= ?", min_corners),
+                           ("centering_h <= ?", max_centering_h),
+                           ("centering_v <= ?", max_centering_v),
+                           ("source = ?", source), ("run = ?", run)):
+            if value is not None:
+                clauses.append(sql)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, order_by="graded_at", descending=True, limit=None, offset=0, **filters):
+        """
+        Results matching every given filter, as dicts:
+
+          min_grade / max_grade     predicted grade range (inclusive)
+          card                      exact card name, case-insensitive
+          since / until             epoch seconds, until exclusive
+          min_surface / min_corners score thresholds
+          max_centering_h / _v      centering label thresholds (lower is better)
+          source / run              where the result came from
+        """
+        if order_by not in COLUMNS + ("id",):
+            raise ValueError(f"Cannot order by {order_by}")
+        where, params = self._where(**filters)
+        sql = (f"SELECT * FROM results{where} ORDER BY {order_by} "
+               f"{'DESC' if descending else 'ASC'}, id")
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+
+    def grade_histogram(self, **filters):
+        """{grade: count} for the matching results."""
+        where, params = self._where(**filters)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT grade, COUNT(*) FROM results{where} GROUP BY grade ORDER BY grade", params)
+            return {grade: n for grade, n in rows}
+
+    # --- CSV ---
+    def export_csv(self, csv_path, **filters):
+        """
+        Writes matching results in the imgFolderToTxtFile CSV format (header
+        plus one row per result, oldest first). Returns rows written.
+        """
+        rows = self.query(descending=False, **filters)
+        with open(csv_path, "w", newline="", encoding="utf-8") as fout:
+            writer = csv.writer(fout)
+            writer.writerow(CSV_HEADER)
+            for r in rows:
+                writer.writerow(measurement_row(r["filename"], r))
+        return len(rows)
+
+    def import_csv(self, csv_path, source="csv", run=None):
+        """Loads an existing measurement CSV (with or without header). Returns rows stored."""
+        results = []
+        with open(csv_path, newline="", encoding="utf-8") as fin:
+            for row in csv.reader(fin):
+                if not row or row[0] == CSV_HEADER[0]:
+                    continue
+                results.append({"filename": row[0], "surface": row[1], "corners": row[2],
+                                "centering_h": row[3], "centering_v": row[4]})
+        return self.add_many(results, source=source, run=run or os.path.basename(csv_path))
@@ -0,0 +1,228 @@
+import os
+import math
+import time
+import multiprocessing as mp
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+# Environment variables read by the BLAS/OpenMP runtimes when they load
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+# ---------- Core Detection ----------
+def _cgroup_cpu_limit():
+    """CPU limit from the cgroup quota (v2 cpu.max or v1 cfs files), or None."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cores():
+    """
+    Cores this process may actually use: the CPU affinity mask, further
+    capped by a cgroup CPU quota (containers report the host's core count
+    through os.cpu_count but are throttled to their quota).
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:   # not available on Windows / macOS
+        cores = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cores = min(cores, max(1, math.ceil(limit)))
+    return max(1, cores)
+
+
+# ---------- Thread Plans ----------
+def plan_threads(cores=None, workers=None):
+    """
+    Splits cores between worker processes and the threads inside each one.
+
+    Per-card OpenCV calls are short, so OpenCV's own thread pool scales
+    poorly on them; by default every core gets its own single-threaded
+    worker. When the worker count is fixed (e.g. to bound memory), the
+    remaining cores are handed to OpenCV inside each worker instead. BLAS
+    only runs the model's small batched predictions, so it always gets one
+    thread per worker.
+    """
+    cores = cores or available_cores()
+    workers = max(1, min(workers or cores, cores))
+    return {
+        "cores": cores,
+        "workers": workers,
+        "cv_threads": max(1, cores // workers),
+        "blas_threads": 1,
+    }
+
+
+def apply_thread_limits(cv_threads, blas_threads=1):
+    """
+    Applies a plan's per-process limits to the current process. OpenCV takes
+    effect immediately; the BLAS variables only reach runtimes loaded after
+    this call (worker processes), so threadpoolctl is used when installed to
+    limit an already loaded BLAS too.
+    """
+    cv2.setNumThreads(int(cv_threads))
+    _set_blas_env(blas_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(limits=int(blas_threads))
+
+
+def _set_blas_env(blas_threads):
+    """Sets the BLAS variables; returns their previous values for _restore_env."""
+    saved = {var: os.environ.get(var) for var in BLAS_ENV_VARS}
+    for var in BLAS_ENV_VARS:
+        os.environ[var] = str(int(blas_threads))
+    return saved
+
+
+def _restore_env(saved):
+    for var, value in saved.items():
+        if value is None:
+            os.environ.pop(var, None)
+        else:
+            os.environ[var] = value
+
+
+@contextmanager
+def thread_limits(cv_threads, blas_threads=1):
+    """
+    apply_thread_limits for the duration of a with block: the OpenCV thread
+    count, the BLAS variables and any threadpoolctl limits are put back as
+    they were afterwards, so running one plan in-process does not change
+    the caller's settings.
+    """
+    saved_cv = cv2.getNumThreads()
+    cv2.setNumThreads(int(cv_threads))
+    saved_env = _set_blas_env(blas_threads)
+    try:
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            yield
+        else:
+            with threadpool_limits(limits=int(blas_threads)):
+                yield
+    finally:
+        cv2.setNumThreads(saved_cv)
+        _restore_env(saved_env)
+
+
+def _init_worker(cv_threads, blas_threads):
+    apply_thread_limits(cv_threads, blas_threads)
+
+
+def _measure_path(args):
+    path, scan_step, color_tol = args
+    from MeasurementCalculator import measure_card_image
+    image = cv2.imread(path)
+    if image is None:
+        return None, f"Could not read image at {path}"
+    try:
+        return measure_card_image(image, scan_step=scan_step, color_tol=color_tol), None
+    except Exception as e:
+        return None, str(e)
+
+
+# ---------- Scheduled Measurement ----------
+def measure_files(files, plan=None, scan_step=5, color_tol=30, chunksize=1):
+    """
+    Measures image files with plan["workers"] processes, each limited to the
+    plan's OpenCV and BLAS thread counts. Yields (path, measurement, error)
+    in input order. With a single worker the files are measured in this
+    process under the plan's limits, which are lifted again once the
+    generator finishes or is closed.
+    """
+    plan = plan or plan_threads()
+    files = list(files)
+    if plan["workers"] == 1:
+        # No pool needed; still honour the plan's thread counts
+        with thread_limits(plan["cv_threads"], plan["blas_threads"]):
+            for path in files:
+                yield (path,) + _measure_path((path, scan_step, color_tol))
+        return
+
+    # BLAS reads its limits when first loaded, so set them before spawning
+    saved = _set_blas_env(plan["blas_threads"])
+    try:
+        with ProcessPoolExecutor(max_workers=plan["workers"],
+                                 mp_context=mp.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(plan["cv_threads"], plan["blas_threads"])) as pool:
+            tasks = [(path, scan_step, color_tol) for path in files]
+            for path, (measurement, error) in zip(files, pool.map(_measure_path, tasks,
+                                                                  chunksize=chunksize)):
+                yield path, measurement, error
+    finally:
+        _restore_env(saved)
+
+
+# ---------- Calibration ----------
+def candidate_plans(cores=None):
+    """Every worker count that divides the cores evenly, e.g. 8 -> 1x8, 2x4, 4x2, 8x1."""
+    cores = cores or available_cores()
+    return [plan_threads(cores, workers) for workers in range(1, cores + 1) if cores % workers == 0]
+
+
+def calibrate(sample_files, cores=None, scan_step=5, color_tol=30, plans=None):
+    """
+    Times each candidate split on a short sample (a few images per worker is
+    enough) and returns (best_plan, timings). Worker start-up is included,
+    as it is in a real run.
+    """
+    sample_files = list(sample_files)
+    if not sample_files:
+        raise ValueError("Calibration needs at least one sample image.")
+    timings = []
+    for plan in plans or candidate_plans(cores):
+        start = time.perf_counter()
+        for _ in measure_files(sample_files, plan, scan_step=scan_step, color_tol=color_tol):
+            pass
+        seconds = time.perf_counter() - start
+        timings.append(dict(plan, seconds=round(seconds, 3),
+                            images_per_second=round(len(sample_files) / seconds, 2)))
+    best = max(timings, key=lambda t: t["images_per_second"])
+    return plan_threads(best["cores"], best["workers"]), timings
+
+
+def startup_plan(sample_files=None, workers=None):
+    """
+    The plan to run with: calibrated on sample_files when given, otherwise
+    the plan_threads default for the detected cores.
+    """
+    if sample_files and workers is None:
+        plan, _ = calibrate(sample_files)
+        return plan
+    return plan_threads(workers=workers)
+
+
+if __name__ == "__main__":
+    import sys
+    from MeasurementCalculator import collect_image_files
+    print(f"Available cores: {available_cores()} (os.cpu_count() = {os.cpu_count()})")
+    if len(sys.argv) > 1:
+        best, timings = calibrate(collect_image_files(os.path.abspath(sys.argv[1]))[:8])
+        for t in timings:
+            print(f"{t['workers']} worker(s) x {t['cv_threads']} OpenCV thread(s): "
+                  f"{t['images_per_second']} images/s")
+        print(f"Chosen: {best}")
@@ -1,17 +1,44 @@
 import numpy as np
 import pickle
 import os
+import threading
 from paths import resource_path
 
 # ---------- Load Saved Model ----------
 model_path = resource_path("trained_model.pkl")
-with open(model_path, "rb") as f:
-    model = pickle.load(f)
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """
+    The trained model, unpickled on first use. Unpickling imports scikit-learn,
+    which takes about a second, so it is not done at import time.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                with open(model_path, "rb") as f:
+                    _model = pickle.load(f)
+    return _model
+
+def reload_model():
+    """
+    Re-reads the model file, e.g. after ModelUpdater saved a new version.
+    The new model is loaded before the swap, so predictions running
+    meanwhile keep using the old one.
+    """
+    global _model
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    with _model_lock:
+        _model = model
+    return model
 
 # ---------- Predict Function ----------
 def predict_card_grade(surface, corners, centering_h, centering_v):
     input_data = np.array([[surface, corners, centering_h, centering_v]])
-    predicted_grade = model.predict(input_data)[0]
+    predicted_grade = get_model().predict(input_data)[0]
     
     return {
         "surface": round(surface, 2),
@@ -20,3 +47,38 @@ def predict_card_grade(surface, corners, centering_h, centering_v):
         "centering_v": round(centering_v, 2),
         "predicted_grade": round(predicted_grade, 1)
     }
+
+# ---------- Batched Predict Function ----------
+def predict_card_grades(measurements):
+    """
+    Batched version of predict_card_grade: one model.predict call for many cards.
+    measurements is a list of dicts with surface/corners/centering_h/centering_v keys.
+    """
+    if not measurements:
+        return []
+    input_data = np.array([[m["surface"], m["corners"], m["centering_h"], m["centering_v"]]
+                           for m in measurements])
+    predicted_grades = get_model().predict(input_data)
+
+    return [
+        {
+            "surface": round(m["surface"], 2),
+            "corners": round(m["corners"], 2),
+            "centering_h": round(m["centering_h"], 2),
+            "centering_v": round(m["centering_v"], 2),
+            "predicted_grade": round(grade, 1)
+        }
+        for m, grade in zip(measurements, predicted_grades)
+    ]
+
+# ---------- Per-tree Spread ----------
+def predict_grades_with_spread(measurements):
+    """
+    Forest prediction plus the standard deviation of the individual trees'
+    predictions, a cheap confidence measure (wide spread = trees disagree).
+    Returns (grades, spreads) as arrays aligned with measurements.
+    """
+    input_data = np.array([[m["surface"], m["corners"], m["centering_h"], m["centering_v"]]
+                           for m in measurements])
+    per_tree = np.stack([tree.predict(input_data) for tree in get_model().estimators_])
+    return per_tree.mean(axis=0), per_tree.std(axis=0)
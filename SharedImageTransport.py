@@ -0,0 +1,203 @@
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from multiprocessing import shared_memory
+import numpy as np
+
+from MeasurementCalculator import measure_card_image, load_card_image
+
+# ---------- Constants ----------
+DEFAULT_SLOT_BYTES = 48 * 1024 * 1024   # one 16 MP BGR frame
+
+
+def _attach(name):
+    """
+    Attach to the producer's block. Spawned workers share the producer's
+    resource tracker, so the block stays registered exactly once and is
+    unlinked only by SharedFramePool.close().
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+# ---------- Slot Pool ----------
+class SharedFramePool:
+    """
+    Fixed pool of equally sized frame slots in one shared memory block.
+
+    The creating (producer) process owns allocation: it writes a decoded frame
+    into a free slot once and passes only (slot, shape, dtype) to workers, who
+    read it through a NumPy view without copying. A slot is only returned to
+    the free list by the producer, once it has the worker's result or has
+    seen the worker die.
+    """
+
+    def __init__(self, slots=8, slot_bytes=DEFAULT_SLOT_BYTES):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._free = list(range(slots))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def has_free_slot(self):
+        return bool(self._free)
+
+    def write(self, image):
+        """Copies a frame into a free slot and returns its (slot, shape, dtype) reference."""
+        if image.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {image.nbytes} bytes does not fit a {self.slot_bytes} byte slot.")
+        slot = self._free.pop()
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=self.shm.buf,
+                          offset=slot * self.slot_bytes)
+        view[...] = image
+        return slot, image.shape, image.dtype.str
+
+    def view(self, ref):
+        slot, shape, dtype = ref
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=self.shm.buf,
+                          offset=slot * self.slot_bytes)
+
+    def free(self, slot):
+        self._free.append(slot)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+# ---------- Worker Process ----------
+def _worker_main(shm_name, slot_bytes, conn, scan_step, color_tol):
+    shm = _attach(shm_name)
+    try:
+        while True:
+            task = conn.recv()
+            if task is None:
+                return
+            task_id, (slot, shape, dtype) = task
+            image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf,
+                               offset=slot * slot_bytes)
+            try:
+                measurement = measure_card_image(image, scan_step=scan_step, color_tol=color_tol)
+                conn.send((task_id, measurement, None))
+            except Exception as e:
+                conn.send((task_id, None, str(e)))
+            finally:
+                del image  # drop the view before the block can be closed
+    except EOFError:
+        return  # producer went away
+    finally:
+        shm.close()
+
+
+class _Worker:
+    """One worker process, its private pipe and the tasks it currently holds."""
+
+    def __init__(self, ctx, pool, scan_step, color_tol):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main,
+                                   args=(pool.name, pool.slot_bytes, child_conn,
+                                         scan_step, color_tol),
+                                   daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.holding = {}   # task_id -> slot reference
+
+    def send(self, task_id, ref):
+        self.holding[task_id] = ref
+        try:
+            self.conn.send((task_id, ref))
+        except (BrokenPipeError, OSError):
+            pass  # already dead; its sentinel will hand the task back
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+# ---------- Multi-process Grading ----------
+def measure_frames_multiprocess(frames, workers=2, slots=None, slot_bytes=DEFAULT_SLOT_BYTES,
+                                scan_step=1, color_tol=20, max_retries=1):
+    """
+    Measures frames (paths, encoded bytes or BGR arrays) in worker processes
+    with shared-memory hand-off. Returns a list in input order whose items are
+    either a measurement dict or an error string.
+
+    Each worker has its own pipe, so a worker that is killed can never wedge a
+    queue lock the others depend on. When a worker dies, the slots it held
+    still contain their decoded frames; those tasks are handed to the other
+    workers (up to max_retries times) and a replacement process is started.
+    """
+    frames = list(frames)
+    ctx = mp.get_context("spawn")
+    pool = SharedFramePool(slots=slots or 2 * workers, slot_bytes=slot_bytes)
+    procs = [_Worker(ctx, pool, scan_step, color_tol) for _ in range(workers)]
+
+    outputs = [None] * len(frames)
+    backlog = []        # (task_id, ref) waiting for a worker
+    retries = {}
+    next_frame = 0
+    done = 0
+
+    try:
+        while done < len(frames):
+            # Decode into every free slot, then hand tasks to the least busy workers
+            while next_frame < len(frames) and pool.has_free_slot():
+                task_id = next_frame
+                next_frame += 1
+                try:
+                    backlog.append((task_id, pool.write(load_card_image(frames[task_id]))))
+                except Exception as e:
+                    outputs[task_id] = str(e)
+                    done += 1
+            while backlog:
+                min(procs, key=lambda w: len(w.holding)).send(*backlog.pop())
+
+            if done >= len(frames):
+                break
+
+            by_handle = {}
+            for w in procs:
+                by_handle[w.conn] = w
+                by_handle[w.process.sentinel] = w
+            for ready in wait(list(by_handle), timeout=1.0):
+                w = by_handle[ready]
+                if w not in procs:
+                    continue  # already replaced earlier in this round
+                if ready is w.conn:
+                    try:
+                        task_id, measurement, error = w.conn.recv()
+                    except (EOFError, OSError):
+                        continue  # death is handled through the sentinel
+                    ref = w.holding.pop(task_id)
+                    pool.free(ref[0])
+                    outputs[task_id] = measurement if error is None else error
+                    done += 1
+                else:
+                    # Worker died: recover its slots, replace the process
+                    procs[procs.index(w)] = _Worker(ctx, pool, scan_step, color_tol)
+                    for task_id, ref in w.holding.items():
+                        retries[task_id] = retries.get(task_id, 0) + 1
+                        if retries[task_id] > max_retries:
+                            pool.free(ref[0])
+                            outputs[task_id] = "Worker died while measuring this frame."
+                            done += 1
+                        else:
+                            backlog.append((task_id, ref))
+                    w.holding.clear()
+                    w.conn.close()
+    finally:
+        for w in procs:
+            w.stop()
+        pool.close()
+
+    return outputs
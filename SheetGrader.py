@@ -0,0 +1,132 @@
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from MeasurementCalculator import (CARD_WIDTH_MM, CARD_HEIGHT_MM, four_point_transform,
+                                   measure_warped_card, load_card_image)
+from Scikit_Learn_Model import predict_card_grades
+from Scheduler import available_cores
+
+# ---------- Constants ----------
+CARD_ASPECT = CARD_WIDTH_MM / CARD_HEIGHT_MM   # short side / long side
+
+
+# ---------- Card Rectangle Detection ----------
+def detect_sheet_cards(image, color_tol=30, min_area_ratio=0.005, aspect_tol=0.15,
+                       edge_band=10):
+    """
+    Finds every card on a flatbed sheet.
+
+    The background colour is estimated from a band around the image edges; any
+    pixel further than color_tol from it is foreground (the same colour-distance
+    test detect_card_contour uses along its scan lines). Card-shaped blobs are
+    kept and returned as 4x2 float32 corner arrays, in no particular order.
+    """
+    h, w = image.shape[:2]
+    band = np.concatenate([
+        image[:edge_band].reshape(-1, 3),
+        image[-edge_band:].reshape(-1, 3),
+        image[:, :edge_band].reshape(-1, 3),
+        image[:, -edge_band:].reshape(-1, 3),
+    ])
+    bg_color = np.median(band, axis=0)
+
+    dist = np.linalg.norm(image.astype(np.float32) - bg_color.astype(np.float32), axis=2)
+    mask = (dist > color_tol).astype(np.uint8) * 255
+
+    # Close small gaps in pale card borders, drop speckle from the scanner lid
+    kernel = np.ones((5, 5), np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = min_area_ratio * w * h
+
+    cards = []
+    for c in contours:
+        if cv2.contourArea(c) < min_area:
+            continue
+        rect = cv2.minAreaRect(c)
+        rw, rh = rect[1]
+        if rw <= 0 or rh <= 0:
+            continue
+        aspect = min(rw, rh) / max(rw, rh)
+        if abs(aspect - CARD_ASPECT) > aspect_tol:
+            continue
+        cards.append(cv2.boxPoints(rect).astype("float32"))
+    return cards
+
+
+def sort_by_position(card_boxes):
+    """
+    Orders card boxes row by row, left to right. A new row starts when a card's
+    centre is more than half a card height below the current row's first card.
+    Returns [((row, col), box)].
+    """
+    if not card_boxes:
+        return []
+    centers = [box.mean(axis=0) for box in card_boxes]
+    heights = [np.ptp(box[:, 1]) for box in card_boxes]
+    row_gap = np.median(heights) / 2.0
+
+    order = sorted(range(len(card_boxes)), key=lambda i: centers[i][1])
+    rows = []
+    for i in order:
+        if rows and centers[i][1] - centers[rows[-1][0]][1] <= row_gap:
+            rows[-1].append(i)
+        else:
+            rows.append([i])
+
+    positioned = []
+    for r, row in enumerate(rows):
+        for c, i in enumerate(sorted(row, key=lambda i: centers[i][0])):
+            positioned.append(((r, c), card_boxes[i]))
+    return positioned
+
+
+def warp_sheet_card(image, box):
+    """Perspective-corrects one card and rotates it upright (portrait)."""
+    warped = four_point_transform(image, box)
+    if warped.shape[1] > warped.shape[0]:
+        warped = cv2.rotate(warped, cv2.ROTATE_90_CLOCKWISE)
+    return warped
+
+
+# ---------- Sheet Grading ----------
+def grade_sheet(image_or_path, max_workers=None, color_tol=30):
+    """
+    Grades every card on a sheet from a single decode.
+
+    Cards are measured in parallel threads (the OpenCV calls release the GIL)
+    and then predicted with one batched model call. Returns one dict per card,
+    in reading order, with its "position" (row, col) and "box" corners added.
+    """
+    image = load_card_image(image_or_path)
+
+    positioned = sort_by_position(detect_sheet_cards(image, color_tol=color_tol))
+    if not positioned:
+        return []
+
+    def measure(item):
+        _, box = item
+        return measure_warped_card(warp_sheet_card(image, box))
+
+    workers = max_workers or min(len(positioned), available_cores())
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        measurements = list(pool.map(measure, positioned))
+
+    results = []
+    for (position, box), prediction in zip(positioned, predict_card_grades(measurements)):
+        prediction["position"] = position
+        prediction["box"] = box.tolist()
+        results.append(prediction)
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    for card in grade_sheet(sys.argv[1]):
+        row, col = card["position"]
+        print(f"Row {row + 1}, Col {col + 1}: PSA {card['predicted_grade']} "
+              f"(surface:{card['surface']}, corners:{card['corners']}, "
+              f"centering_h:{card['centering_h']}, centering_v:{card['centering_v']})")
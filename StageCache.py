@@ -0,0 +1,268 @@
+import os
+import csv
+import json
+import time
+import hashlib
+import threading
+import traceback
+
+import cv2
+import numpy as np
+
+from MeasurementCalculator import (CSV_HEADER, SURFACE_CANNY, CORNER_BORDER_PX, CENTERING_BINS,
+                                   UnreadableImageError, CardNotDetectedError, error_outcome,
+                                   collect_image_files, measurement_row, detect_card_contour,
+                                   four_point_transform, measure_border_mm, centering_from_borders,
+                                   compute_surface_score, compute_corners_score)
+from Metrics import GradingMetrics, print_event, SUCCESS, ERROR
+
+# ---------- Constants ----------
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".ai_pokemon_grader", "stage_cache")
+PNG_COMPRESSION = 3   # lossless either way; higher levels only cost time
+# Part of every stage key. Bump it whenever detection, warping or scoring
+# code changes what a stage produces, so results cached by older code are
+# not reused.
+CACHE_VERSION = 2
+
+# Stage -> (upstream stage, parameters its output depends on). A stage's key
+# hashes its upstream key with these parameters, so changing a parameter
+# invalidates that stage and everything below it, and nothing above.
+STAGES = {
+    "corners": ("source", ("scan_step", "color_tol", "min_run")),
+    "warp": ("corners", ()),
+    "borders": ("warp", ("artwork_engine", "centering_engine")),
+    "surface": ("warp", ("surface_canny",)),
+    "corner_score": ("warp", ("border_px",)),
+}
+
+# Same defaults as imgFolderToTxtFile. centering_bins only maps cached border
+# widths to decimals, which is too cheap to cache.
+DEFAULT_PARAMS = {
+    "scan_step": 5,
+    "color_tol": 30,
+    "min_run": 2,
+    "artwork_engine": "contours",
+    "centering_engine": "artwork",
+    "surface_canny": SURFACE_CANNY,
+    "border_px": CORNER_BORDER_PX,
+    "centering_bins": CENTERING_BINS,
+}
+
+
+def _digest(value):
+    return hashlib.blake2b(json.dumps(value).encode("utf-8"), digest_size=16).hexdigest()
+
+
+# ---------- Cache ----------
+class StageCache:
+    """
+    On-disk cache of per-image intermediate results, one file per artifact:
+
+      corners        detected corner points (JSON)
+      warp           the perspective-corrected card (lossless PNG)
+      borders        raw border widths in mm (JSON)
+      surface        surface score for the given Canny thresholds (JSON)
+      corner_score   corners score for the given border_px (JSON)
+
+    Inputs are identified by a hash of the file contents, remembered per
+    (path, size, mtime) so unchanged files are not re-read to hash them.
+    Writes go through a temporary file and os.replace, so several processes
+    can share one cache directory.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, png_compression=PNG_COMPRESSION):
+        self.cache_dir = cache_dir
+        self.png_compression = png_compression
+        self.stats = {stage: {"hits": 0, "misses": 0} for stage in STAGES}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # --- Files ---
+    def _path(self, stage, key, ext):
+        return os.path.join(self.cache_dir, stage, key[:2], key + ext)
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _count(self, stage, hit):
+        with self._lock:
+            self.stats[stage]["hits" if hit else "misses"] += 1
+
+    def get_json(self, stage, key):
+        try:
+            with open(self._path(stage, key, ".json"), encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self._count(stage, False)
+            return None
+        self._count(stage, True)
+        return value
+
+    def put_json(self, stage, key, value):
+        self._write(self._path(stage, key, ".json"), json.dumps(value).encode("utf-8"))
+
+    def get_image(self, stage, key):
+        path = self._path(stage, key, ".png")
+        image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR) \
+            if os.path.exists(path) else None
+        self._count(stage, image is not None)
+        return image
+
+    def put_image(self, stage, key, image):
+        ok, buf = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression])
+        if ok:
+            self._write(self._path(stage, key, ".png"), buf.tobytes())
+
+    # --- Keys ---
+    def input_hash(self, path):
+        """Content hash of an input file, cached by (path, size, mtime)."""
+        st = os.stat(path)
+        stamp = [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+        index_path = self._path("inputs", _digest(stamp[0]), ".json")
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry["stamp"] == stamp:
+                return entry["hash"]
+        except (OSError, ValueError, KeyError):
+            pass
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self._write(index_path, json.dumps({"stamp": stamp, "hash": digest}).encode("utf-8"))
+        return digest
+
+    @staticmethod
+    def stage_keys(source_hash, params):
+        """Key of every stage for one input under params and CACHE_VERSION."""
+        keys = {"source": source_hash}
+        for stage, (upstream, names) in STAGES.items():
+            keys[stage] = _digest([CACHE_VERSION, stage, keys[upstream],
+                                   [params[n] for n in names]])
+        return keys
+
+    # --- Measurement ---
+    def measure(self, path, params=None):
+        """
+        Same result as measure_card_image for the given parameters, computing
+        only the stages that are not cached yet. The image is decoded only
+        when its corners or warp are missing; the warp is loaded only when a
+        stage below it is missing.
+        """
+        params = dict(DEFAULT_PARAMS, **(params or {}))
+        keys = self.stage_keys(self.input_hash(path), params)
+        warped = None
+
+        def get_warp():
+            nonlocal warped
+            if warped is not None:
+                return warped
+            warped = self.get_image("warp", keys["warp"])
+            if warped is not None:
+                return warped
+            image = cv2.imread(path)
+            if image is None:
+                raise UnreadableImageError(f"Could not read image at {path}")
+            corners = self.get_json("corners", keys["corners"])
+            if corners is None:
+                corners = detect_card_contour(image, scan_step=params["scan_step"],
+                                              color_tol=params["color_tol"],
+                                              min_run=params["min_run"])
+                if corners is None:
+                    raise CardNotDetectedError("Card contour not detected.")
+                corners = corners.tolist()
+                self.put_json("corners", keys["corners"], corners)
+            warped = four_point_transform(image, np.array(corners, dtype="float32"))
+            self.put_image("warp", keys["warp"], warped)
+            return warped
+
+        borders = self.get_json("borders", keys["borders"])
+        if borders is None:
+            borders = measure_border_mm(get_warp(), centering_engine=params["centering_engine"],
+                                        artwork_engine=params["artwork_engine"])
+            self.put_json("borders", keys["borders"], borders)
+
+        surface = self.get_json("surface", keys["surface"])
+        if surface is None:
+            surface = compute_surface_score(get_warp(), *params["surface_canny"])
+            self.put_json("surface", keys["surface"], surface)
+
+        corners_score = self.get_json("corner_score", keys["corner_score"])
+        if corners_score is None:
+            corners_score = float(compute_corners_score(get_warp(), border_px=params["border_px"]))
+            self.put_json("corner_score", keys["corner_score"], corners_score)
+
+        psa_h, psa_v, _ = centering_from_borders(borders, params["centering_bins"])
+        return {
+            "surface": surface,
+            "corners": corners_score,
+            "centering_h": psa_h,
+            "centering_v": psa_v,
+        }
+
+    def stats_line(self):
+        return ", ".join(f"{stage} {s['hits']}/{s['hits'] + s['misses']}"
+                         for stage, s in self.stats.items() if s["hits"] + s["misses"])
+
+
+# ---------- Batch Entry Point ----------
+def imgFolderToTxtFileCached(folder_path,
+                             output_csv_path,
+                             supported_exts=(".jpg", ".jpeg", ".png", ".bmp"),
+                             cache_dir=DEFAULT_CACHE_DIR,
+                             metrics=None,
+                             **params):
+    """
+    imgFolderToTxtFile backed by a StageCache: a re-run after changing only
+    a scoring parameter (surface_canny, border_px, centering_bins) reuses the
+    cached warps, and one that changes nothing reuses every result. Accepts
+    the DEFAULT_PARAMS names as keyword arguments. Returns rows written.
+    """
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise TypeError(f"Unknown stage parameters: {', '.join(sorted(unknown))}")
+    if metrics is None:
+        metrics = GradingMetrics(run_name=os.path.basename(os.path.abspath(folder_path)),
+                                 hooks=[print_event])
+    folder_path = os.path.abspath(folder_path)
+    output_csv_path = os.path.abspath(output_csv_path)
+
+    files = collect_image_files(folder_path, supported_exts)
+    if not files:
+        print(f"No images found in {folder_path}.")
+        return 0
+
+    os.makedirs(os.path.dirname(output_csv_path), exist_ok=True)
+    write_header = not os.path.exists(output_csv_path)
+    cache = StageCache(cache_dir)
+    processed = 0
+    run_start = time.perf_counter()
+
+    with open(output_csv_path, "a", newline="", encoding="utf-8") as fout:
+        writer = csv.writer(fout)
+        if write_header:
+            writer.writerow(CSV_HEADER)
+
+        for fpath in files:
+            start = time.perf_counter()
+            try:
+                measurement = cache.measure(fpath, params)
+            except Exception as e:
+                outcome = error_outcome(e)
+                metrics.record(fpath, outcome, error=str(e), seconds=time.perf_counter() - start,
+                               traceback=traceback.format_exc() if outcome == ERROR else None)
+                continue
+            writer.writerow(measurement_row(os.path.basename(fpath), measurement))
+            processed += 1
+            metrics.record(fpath, SUCCESS, seconds=time.perf_counter() - start)
+
+    print(f"Stage cache hits: {cache.stats_line()} "
+          f"({time.perf_counter() - run_start:.2f}s)")
+    print(f"Completed. {processed} images written to CSV.")
+    return processed
@@ -0,0 +1,242 @@
+import os
+import time
+import heapq
+import cv2
+import numpy as np
+
+from MeasurementCalculator import (detect_card_contour, is_fallback_contour, four_point_transform,
+                                   measure_warped_card, collect_image_files, RawFrameDump)
+from Scikit_Learn_Model import predict_card_grades
+
+# ---------- Constants ----------
+MOTION_THUMB_WIDTH = 64      # frames are compared at this width to detect motion
+SHARPNESS_THUMB_WIDTH = 256  # warped cards are scored for focus at this width
+
+
+# ---------- Frame Sources ----------
+class FrameSource:
+    """
+    Sequential frames from a video file, a folder of still frames or a
+    RawFrameDump. skip() advances without decoding where the backend allows
+    it (VideoCapture.grab for video, simply not reading the file for stills);
+    raw dump frames are zero-copy views and never need decoding.
+    """
+
+    def __init__(self, source, fps=None):
+        self.index = 0
+        self._dump = None
+        if isinstance(source, RawFrameDump):
+            self._files = None
+            self._cap = None
+            self._dump = source
+            self.fps = fps or 30.0
+        elif os.path.isdir(source):
+            self._files = collect_image_files(source)
+            self._cap = None
+            self.fps = fps or 30.0
+        else:
+            self._files = None
+            self._cap = cv2.VideoCapture(source)
+            if not self._cap.isOpened():
+                raise ValueError(f"Could not open video at {source}")
+            self.fps = fps or self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def read(self):
+        """Returns (frame_index, frame) or None when the stream is exhausted."""
+        if self._cap is not None:
+            ok, frame = self._cap.read()
+            if not ok:
+                return None
+        elif self._dump is not None:
+            if self.index >= len(self._dump):
+                return None
+            frame = self._dump[self.index]
+        else:
+            if self.index >= len(self._files):
+                return None
+            frame = cv2.imread(self._files[self.index])
+            if frame is None:
+                raise ValueError(f"Could not read frame {self._files[self.index]}")
+        idx = self.index
+        self.index += 1
+        return idx, frame
+
+    def skip(self, n):
+        for _ in range(n):
+            if self._cap is not None:
+                if not self._cap.grab():
+                    return
+            elif self.index >= len(self._files if self._dump is None else self._dump):
+                return
+            self.index += 1
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
+
+
+# ---------- Per-frame Helpers ----------
+def motion_thumbnail(frame):
+    h, w = frame.shape[:2]
+    small = cv2.resize(frame, (MOTION_THUMB_WIDTH, max(1, h * MOTION_THUMB_WIDTH // w)),
+                       interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+
+def sharpness(card_img):
+    """Variance of the Laplacian on a fixed-width copy, so scores compare across frames."""
+    h, w = card_img.shape[:2]
+    small = cv2.resize(card_img, (SHARPNESS_THUMB_WIDTH, max(1, h * SHARPNESS_THUMB_WIDTH // w)),
+                       interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def aggregate_measurements(measurements):
+    """Median of each score over several frames of the same card."""
+    return {key: float(np.median([m[key] for m in measurements]))
+            for key in ("surface", "corners", "centering_h", "centering_v")}
+
+
+# ---------- Stream Grading ----------
+class _CardTrack:
+    """Geometry and best frames collected for the card currently in view."""
+
+    def __init__(self, corners, first_frame, keep):
+        self.corners = corners
+        self.first_frame = first_frame
+        self.last_frame = first_frame
+        self.keep = keep
+        self.best = []   # min-heap of (sharpness, frame_index, warped)
+
+    def offer(self, frame_index, warped, score):
+        self.last_frame = frame_index
+        item = (score, frame_index, warped)
+        if len(self.best) < self.keep:
+            heapq.heappush(self.best, item)
+        elif score > self.best[0][0]:
+            heapq.heapreplace(self.best, item)
+
+    def close(self):
+        """
+        Measures the kept warps and releases them, so a long recording only
+        ever holds the warps of the card currently in view. Returns the
+        aggregated measurement, or None if no frame was sharp enough.
+        """
+        self.frames_used = sorted(idx for _, idx, _ in self.best)
+        measurement = None
+        if self.best:
+            measurement = aggregate_measurements([measure_warped_card(w) for _, _, w in self.best])
+        self.best = []
+        return measurement
+
+
+def grade_stream(source, fps=None, realtime=True, motion_threshold=6.0, new_card_ratio=0.05,
+                 min_sharpness=50.0, frames_per_card=5, scan_step=5, color_tol=30):
+    """
+    Grades cards passing through a recorded video (or a folder of frames).
+
+    Card corners from detect_card_contour are reused from frame to frame and
+    only re-detected once the frame differs from the one they were found on by
+    more than motion_threshold (mean absolute grey difference on a thumbnail).
+    A re-detection whose corners moved more than new_card_ratio of the frame
+    diagonal starts a new card. Frames where no card is found (the contour is
+    detect_card_contour's whole-frame fallback) are skipped and end the
+    current card. Each card keeps its frames_per_card sharpest warps; those
+    are measured and released as soon as the card leaves or the next card
+    starts, and the median scores of every card are graded in one batched
+    prediction at the end.
+
+    With realtime=True frames are skipped whenever processing falls behind the
+    stream's own clock, emulating a live capture rig on recorded footage.
+
+    Returns (cards, stats).
+    """
+    frames = FrameSource(source, fps=fps)
+    stats = {"frames_read": 0, "frames_skipped": 0, "redetections": 0, "sharp_frames": 0,
+             "empty_frames": 0}
+    graded = []   # [(track, measurement)] of closed tracks
+    track = None
+    in_view = False
+    ref_thumb = None
+
+    def close(t):
+        measurement = t.close()
+        if measurement is not None:
+            graded.append((t, measurement))
+    start = time.perf_counter()
+
+    try:
+        while True:
+            if realtime:
+                behind = int((time.perf_counter() - start) * frames.fps) - frames.index
+                if behind > 0:
+                    frames.skip(behind)
+                    stats["frames_skipped"] += behind
+
+            item = frames.read()
+            if item is None:
+                break
+            frame_index, frame = item
+            stats["frames_read"] += 1
+
+            thumb = motion_thumbnail(frame)
+            moved = ref_thumb is None or ref_thumb.shape != thumb.shape or \
+                np.abs(thumb - ref_thumb).mean() > motion_threshold
+
+            if moved:
+                corners = detect_card_contour(frame, scan_step=scan_step, color_tol=color_tol)
+                stats["redetections"] += 1
+                ref_thumb = thumb
+
+                in_view = not is_fallback_contour(corners, frame.shape)
+                if not in_view:
+                    if track is not None:   # the card has left the frame
+                        close(track)
+                        track = None
+                else:
+                    h, w = frame.shape[:2]
+                    limit = new_card_ratio * np.hypot(w, h)
+                    if track is None or np.abs(corners - track.corners).max() > limit:
+                        if track is not None:
+                            close(track)
+                        track = _CardTrack(corners, frame_index, frames_per_card)
+                    else:
+                        track.corners = corners
+
+            if not in_view:
+                stats["empty_frames"] += 1
+                continue
+
+            warped = four_point_transform(frame, track.corners)
+            score = sharpness(warped)
+            if score >= min_sharpness:
+                stats["sharp_frames"] += 1
+                track.offer(frame_index, warped, score)
+    finally:
+        frames.close()
+    if track is not None:
+        close(track)
+
+    cards = []
+    predictions = predict_card_grades([m for _, m in graded]) if graded else []
+    for n, ((t, _), prediction) in enumerate(zip(graded, predictions)):
+        prediction.update({
+            "card": n,
+            "first_frame": t.first_frame,
+            "last_frame": t.last_frame,
+            "frames_used": t.frames_used,
+        })
+        cards.append(prediction)
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return cards, stats
+
+
+if __name__ == "__main__":
+    import sys
+    cards, stats = grade_stream(sys.argv[1])
+    for card in cards:
+        print(f"Card {card['card'] + 1} (frames {card['first_frame']}-{card['last_frame']}): "
+              f"PSA {card['predicted_grade']}")
+    print(stats)
@@ -0,0 +1,391 @@
+import os
+import csv
+import json
+import time
+import select
+import struct
+import threading
+import traceback
+import ctypes
+import ctypes.util
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from Metrics import GradingMetrics, print_event, SUCCESS, ERROR
+
+# ---------- Constants ----------
+SUPPORTED_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+SETTLE_SECONDS = 0.5     # size and mtime must hold still this long before grading
+POLL_SECONDS = 1.0       # scan interval of the polling fallback
+IDLE_WAKE_SECONDS = 1.0  # longest block while idle, to notice stop requests
+CRASH_RETRIES = 2        # times a card is requeued after its worker died
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+_EVENT = struct.Struct("iIII")   # wd, mask, cookie, name length
+
+
+def _is_image(name):
+    return os.path.splitext(name)[1].lower() in SUPPORTED_EXTS
+
+
+# ---------- Watchers ----------
+class InotifyWatcher:
+    """
+    Linux inotify through ctypes. wait() blocks in select() until files are
+    created, closed after writing or moved into the folder, so an idle
+    watcher costs no CPU.
+    """
+
+    MASK = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO
+
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.folder = folder
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), self.MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {folder}")
+
+    def wait(self, timeout):
+        """Image paths touched within timeout seconds (empty on timeout)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            name = os.fsdecode(name)
+            if name and _is_image(name):
+                paths.append(os.path.join(self.folder, name))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback for platforms without inotify: rescans the folder every poll_seconds."""
+
+    def __init__(self, folder, poll_seconds=POLL_SECONDS):
+        self.folder = folder
+        self.poll_seconds = poll_seconds
+        self._seen = {}
+        self._next_scan = 0.0
+
+    def wait(self, timeout):
+        delay = self._next_scan - time.monotonic()
+        if timeout is not None:
+            delay = min(delay, timeout)
+        if delay > 0:
+            time.sleep(delay)
+        if time.monotonic() < self._next_scan:
+            return []
+        self._next_scan = time.monotonic() + self.poll_seconds
+        changed = []
+        seen = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not entry.is_file() or not _is_image(entry.name):
+                    continue
+                st = entry.stat()
+                stamp = (st.st_size, st.st_mtime_ns)
+                seen[entry.path] = stamp
+                if self._seen.get(entry.path) != stamp:
+                    changed.append(entry.path)
+        self._seen = seen
+        return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(folder, use_inotify=True, poll_seconds=POLL_SECONDS):
+    """inotify where available, otherwise polling."""
+    if use_inotify and hasattr(select, "select") and os.name == "posix":
+        try:
+            return InotifyWatcher(folder)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling every {poll_seconds}s")
+    return PollingWatcher(folder, poll_seconds)
+
+
+# ---------- Debounce ----------
+class Debouncer:
+    """
+    Holds new files until their size and mtime have been unchanged for
+    settle_seconds, so a scan that is still being written is never read.
+    Remembers when each file was first seen as its landing time.
+    """
+
+    def __init__(self, settle_seconds=SETTLE_SECONDS):
+        self.settle_seconds = settle_seconds
+        self.pending = {}   # path -> [landed (wall clock), stamp, stable since (monotonic)]
+
+    def touch(self, path, landed=None):
+        if path not in self.pending:
+            try:
+                st = os.stat(path)
+                stamp = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                stamp = None
+            self.pending[path] = [landed or time.time(), stamp, time.monotonic()]
+
+    def ready(self):
+        """Paths that have settled, as [(path, landed)]; removes them from pending."""
+        now = time.monotonic()
+        settled = []
+        for path, entry in list(self.pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.pending[path]   # removed or renamed away before it settled
+                continue
+            stamp = (st.st_size, st.st_mtime_ns)
+            if stamp != entry[1]:
+                entry[1], entry[2] = stamp, now
+            elif st.st_size > 0 and now - entry[2] >= self.settle_seconds:
+                settled.append((path, entry[0]))
+                del self.pending[path]
+        return settled
+
+    def next_check(self):
+        """Seconds until the earliest pending file could settle, or None."""
+        if not self.pending:
+            return None
+        now = time.monotonic()
+        return max(0.0, min(e[2] for e in self.pending.values()) + self.settle_seconds - now)
+
+
+# ---------- Warm Workers ----------
+def _init_worker(cv_threads, blas_threads):
+    from Scheduler import apply_thread_limits
+    apply_thread_limits(cv_threads, blas_threads)
+    # Import OpenCV/NumPy and unpickle the model once per worker, not per card
+    import MeasurementCalculator
+    from Scikit_Learn_Model import get_model
+    get_model()
+
+
+def _grade_path(path, scan_step, color_tol):
+    """Runs in a worker: measure and grade one file."""
+    import cv2
+    from MeasurementCalculator import measure_card_image, error_outcome, UnreadableImageError
+    from Scikit_Learn_Model import predict_card_grade
+    start = time.perf_counter()
+    try:
+        image = cv2.imread(path)
+        if image is None:
+            raise UnreadableImageError(f"Could not read image at {path}")
+        measurement = measure_card_image(image, scan_step=scan_step, color_tol=color_tol)
+        prediction = predict_card_grade(measurement["surface"], measurement["corners"],
+                                        measurement["centering_h"], measurement["centering_v"])
+        return {"measurement": measurement, "predicted_grade": float(prediction["predicted_grade"]),
+                "outcome": SUCCESS, "error": None, "traceback": None,
+                "seconds": time.perf_counter() - start}
+    except Exception as e:
+        outcome = error_outcome(e)
+        return {"measurement": None, "predicted_grade": None, "outcome": outcome,
+                "error": str(e), "traceback": traceback.format_exc() if outcome == ERROR else None,
+                "seconds": time.perf_counter() - start}
+
+
+# ---------- Daemon ----------
+def watch_folder(folder_path,
+                 output_csv_path,
+                 latency_log_path=None,
+                 workers=None,
+                 scan_step=5,
+                 color_tol=30,
+                 settle_seconds=SETTLE_SECONDS,
+                 poll_seconds=POLL_SECONDS,
+                 use_inotify=True,
+                 process_existing=True,
+                 metrics=None,
+                 stop_event=None):
+    """
+    Grades every image that lands in folder_path until interrupted (Ctrl+C)
+    or until stop_event is set.
+
+    Each card's measurement is appended to output_csv_path (imgFolderToTxtFile
+    format) as soon as it completes; files already listed there are skipped,
+    so a restarted watcher picks up where it left off. With latency_log_path,
+    one JSON line per card records the predicted grade, the outcome and the
+    end-to-end latency from landing to result, split into settle/queue wait
+    and grading time. Landing is when the watcher first saw the file.
+
+    A worker that dies (crash, OOM kill) breaks the whole process pool. The
+    pool is then replaced with fresh warm workers and the cards that were in
+    flight are requeued, each up to CRASH_RETRIES times, so a file that
+    keeps killing its worker is eventually recorded as an error instead of
+    taking the daemon down.
+    """
+    from MeasurementCalculator import CSV_HEADER, measurement_row, collect_image_files
+    from Scheduler import plan_threads
+
+    folder_path = os.path.abspath(folder_path)
+    output_csv_path = os.path.abspath(output_csv_path)
+    if metrics is None:
+        metrics = GradingMetrics(run_name=f"watch:{os.path.basename(folder_path)}",
+                                 hooks=[print_event])
+    stop_event = stop_event or threading.Event()
+
+    done = set()
+    if os.path.exists(output_csv_path):
+        with open(output_csv_path, newline="", encoding="utf-8") as fin:
+            done = {row[0] for row in csv.reader(fin) if row}
+    os.makedirs(os.path.dirname(output_csv_path), exist_ok=True)
+    write_header = not os.path.exists(output_csv_path)
+    fout = open(output_csv_path, "a", newline="", encoding="utf-8")
+    writer = csv.writer(fout)
+    if write_header:
+        writer.writerow(CSV_HEADER)
+        fout.flush()
+    flog = open(latency_log_path, "a", encoding="utf-8") if latency_log_path else None
+    out_lock = threading.Lock()
+
+    plan = plan_threads(workers=workers)
+
+    def start_pool():
+        new_pool = ProcessPoolExecutor(max_workers=plan["workers"],
+                                       mp_context=mp.get_context("spawn"),
+                                       initializer=_init_worker,
+                                       initargs=(plan["cv_threads"], plan["blas_threads"]))
+        # Start every worker now so the first card does not wait for the model to load
+        for f in [new_pool.submit(time.sleep, 0) for _ in range(plan["workers"])]:
+            f.result()
+        return new_pool
+
+    pool = start_pool()
+    generation = 0        # bumped whenever the pool is replaced
+    pool_broken = threading.Event()
+    requeue = []          # [(path, landed)] whose worker died
+    crashes = {}          # path -> times its worker died
+
+    watcher = make_watcher(folder_path, use_inotify, poll_seconds)
+    debouncer = Debouncer(settle_seconds)
+    in_flight = set()
+    print(f"Watching {folder_path} with {type(watcher).__name__} and "
+          f"{plan['workers']} warm worker(s)...")
+
+    def on_done(path, landed, queued_at, submitted_generation, future):
+        try:
+            result = future.result()
+        except BrokenProcessPool as e:
+            # A worker died and every card in flight on that pool fails with it
+            with out_lock:
+                in_flight.discard(path)
+                crashes[path] = crashes.get(path, 0) + 1
+                retry = crashes[path] <= CRASH_RETRIES
+                if retry:
+                    requeue.append((path, landed))
+            if submitted_generation == generation:
+                pool_broken.set()
+            if retry:
+                return
+            result = {"measurement": None, "predicted_grade": None, "outcome": ERROR,
+                      "error": f"worker process died: {e}", "traceback": None, "seconds": None}
+        except Exception as e:
+            result = {"measurement": None, "predicted_grade": None, "outcome": ERROR,
+                      "error": str(e), "traceback": None, "seconds": None}
+        finished = time.time()
+        latency = finished - landed
+        with out_lock:
+            if result["outcome"] == SUCCESS:
+                writer.writerow(measurement_row(os.path.basename(path), result["measurement"]))
+                fout.flush()
+            if flog is not None:
+                flog.write(json.dumps({
+                    "file": os.path.basename(path),
+                    "outcome": result["outcome"],
+                    "predicted_grade": result["predicted_grade"],
+                    "landed": round(landed, 3),
+                    "finished": round(finished, 3),
+                    "latency_seconds": round(latency, 3),
+                    "wait_seconds": round(queued_at - landed, 3),
+                    "grade_seconds": None if result["seconds"] is None else round(result["seconds"], 3),
+                }) + "\n")
+                flog.flush()
+            in_flight.discard(path)
+        metrics.observe("end_to_end", latency)
+        metrics.record(path, result["outcome"], error=result["error"], seconds=result["seconds"],
+                       traceback=result["traceback"], predicted_grade=result["predicted_grade"])
+
+    def submit(path, landed, retry=False):
+        with out_lock:
+            if not retry and (os.path.basename(path) in done or path in in_flight):
+                return
+            done.add(os.path.basename(path))
+            in_flight.add(path)
+        queued_at = time.time()
+        submitted_generation = generation
+        try:
+            future = pool.submit(_grade_path, path, scan_step, color_tol)
+        except BrokenProcessPool:
+            with out_lock:
+                in_flight.discard(path)
+                requeue.append((path, landed))
+            pool_broken.set()
+            return
+        future.add_done_callback(lambda f: on_done(path, landed, queued_at, submitted_generation, f))
+
+    if process_existing:
+        for path in collect_image_files(folder_path, SUPPORTED_EXTS):
+            if os.path.basename(path) not in done:
+                debouncer.touch(path)
+
+    try:
+        while not stop_event.is_set():
+            timeout = debouncer.next_check()
+            timeout = IDLE_WAKE_SECONDS if timeout is None else min(timeout, IDLE_WAKE_SECONDS)
+            for path in watcher.wait(timeout):
+                if os.path.basename(path) not in done:
+                    debouncer.touch(path)
+            for path, landed in debouncer.ready():
+                submit(path, landed)
+            if pool_broken.is_set():
+                pool_broken.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                generation += 1
+                pool = start_pool()
+                print("A grading worker died; worker pool restarted.")
+            with out_lock:
+                retries, requeue[:] = list(requeue), []
+            for path, landed in retries:
+                submit(path, landed, retry=True)
+    except KeyboardInterrupt:
+        print("Stopping watcher...")
+    finally:
+        watcher.close()
+        pool.shutdown(wait=True)   # let cards already submitted finish
+        fout.close()
+        if flog is not None:
+            flog.close()
+    return metrics.summary()
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print("Usage: python WatchFolder.py <scan folder> <output csv> [latency log] [workers]")
+        sys.exit(1)
+    log_path = sys.argv[3] if len(sys.argv) > 3 else None
+    n_workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    summary = watch_folder(sys.argv[1], sys.argv[2], latency_log_path=log_path, workers=n_workers)
+    print(f"Graded {summary['images']} images: {summary['outcomes']}")
@@ -0,0 +1,340 @@
+import os
+import csv
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import traceback
+import multiprocessing as mp
+
+from Metrics import GradingMetrics, print_event, SUCCESS, UNREADABLE, NO_CONTOUR, ERROR
+
+# ---------- Constants ----------
+LEASE_SECONDS = 60.0
+MAX_ATTEMPTS = 3
+# Outcomes that would fail the same way on every retry
+FINAL_OUTCOMES = (UNREADABLE, NO_CONTOUR)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY,
+    path          TEXT NOT NULL UNIQUE,
+    status        TEXT NOT NULL DEFAULT 'pending',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    worker        TEXT,
+    lease_token   TEXT,
+    lease_expires REAL,
+    enqueued_at   REAL NOT NULL,
+    finished_at   REAL,
+    outcome       TEXT,
+    error         TEXT,
+    surface       REAL,
+    corners       REAL,
+    centering_h   REAL,
+    centering_v   REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, lease_expires);
+"""
+
+
+# ---------- Queue ----------
+class WorkQueue:
+    """
+    Image grading jobs in a SQLite database that every coordinator and worker
+    opens, on one host or on a shared filesystem.
+
+    A job is pending, leased, done or failed. Workers claim pending jobs,
+    and jobs whose lease has expired (the worker died or hung), under a
+    lease that they extend with heartbeats while working. Completing a job
+    is idempotent: the first result wins and a late duplicate from a
+    reclaimed lease changes nothing.
+
+    The database uses the rollback journal rather than WAL, because WAL
+    needs shared memory and does not work across hosts. Lease expiry uses
+    each host's wall clock, so hosts need roughly synchronised clocks
+    (well within lease_seconds).
+    """
+
+    def __init__(self, db_path, timeout=30.0):
+        self.db_path = db_path
+        # Autocommit mode; transactions are opened explicitly where needed
+        self._conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=DELETE")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _transaction(self, fn):
+        """Runs fn(conn) in a write transaction taken up front (BEGIN IMMEDIATE)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    # --- Coordinator ---
+    def enqueue(self, paths):
+        """Adds jobs for paths not queued yet; returns how many were new."""
+        now = time.time()
+        rows = [(os.path.abspath(p), now) for p in paths]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO jobs (path, enqueued_at) VALUES (?, ?)", rows)
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    def progress(self):
+        """{status: count}, with leases that have expired counted as "expired"."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT CASE WHEN status = 'leased' AND lease_expires < ? THEN 'expired' "
+                "ELSE status END, COUNT(*) FROM jobs GROUP BY 1", (time.time(),))
+            counts = {"pending": 0, "leased": 0, "expired": 0, "done": 0, "failed": 0}
+            counts.update({status: n for status, n in rows})
+            return counts
+
+    def results(self):
+        """Finished jobs (done and failed) as dicts, in path order."""
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('done', 'failed') ORDER BY path")]
+
+    def export_csv(self, csv_path):
+        """Writes done jobs in the imgFolderToTxtFile CSV format; returns rows written."""
+        from MeasurementCalculator import CSV_HEADER, measurement_row
+        rows = [r for r in self.results() if r["status"] == "done"]
+        with open(csv_path, "w", newline="", encoding="utf-8") as fout:
+            writer = csv.writer(fout)
+            writer.writerow(CSV_HEADER)
+            for r in rows:
+                writer.writerow(measurement_row(os.path.basename(r["path"]), r))
+        return len(rows)
+
+    # --- Worker ---
+    def claim(self, worker, n=1, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """
+        Leases up to n jobs that are pending or whose lease has expired.
+        Returns [{"id", "path", "token"}]; the token identifies this lease
+        for heartbeat().
+        """
+        def take(conn):
+            now = time.time()
+            ids = [row[0] for row in conn.execute(
+                "SELECT id FROM jobs WHERE (status = 'pending' OR "
+                "(status = 'leased' AND lease_expires < ?)) AND attempts < ? "
+                "ORDER BY id LIMIT ?", (now, max_attempts, n))]
+            claimed = []
+            for job_id in ids:
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE jobs SET status = 'leased', worker = ?, lease_token = ?, "
+                    "lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, token, now + lease_seconds, job_id))
+                path = conn.execute("SELECT path FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+                claimed.append({"id": job_id, "path": path, "token": token})
+            # Expired leases that used up their attempts will never be claimed again
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', outcome = ?, error = 'lease expired', "
+                "finished_at = ? WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (ERROR, now, now, max_attempts))
+            return claimed
+        return self._transaction(take)
+
+    def heartbeat(self, jobs, lease_seconds=LEASE_SECONDS):
+        """
+        Extends the leases of jobs still held under their token. Returns the
+        ids of jobs whose lease was lost (reclaimed by another worker).
+        """
+        def extend(conn):
+            lost = []
+            expires = time.time() + lease_seconds
+            for job in jobs:
+                cur = conn.execute(
+                    "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_token = ? "
+                    "AND status = 'leased'", (expires, job["id"], job["token"]))
+                if cur.rowcount == 0:
+                    lost.append(job["id"])
+            return lost
+        return self._transaction(extend) if jobs else []
+
+    def complete(self, job, measurement):
+        """Stores a result unless the job already has one. Returns True if stored."""
+        def store(conn):
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'done', outcome = ?, error = NULL, finished_at = ?, "
+                "surface = ?, corners = ?, centering_h = ?, centering_v = ?, lease_token = NULL "
+                "WHERE id = ? AND status != 'done'",
+                (SUCCESS, time.time(), float(measurement["surface"]), float(measurement["corners"]),
+                 float(measurement["centering_h"]), float(measurement["centering_v"]), job["id"]))
+            return cur.rowcount == 1
+        return self._transaction(store)
+
+    def fail(self, job, outcome, error, max_attempts=MAX_ATTEMPTS):
+        """
+        Records a failed attempt. Unreadable or undetectable images fail for
+        good; other errors go back to pending until max_attempts is reached.
+        """
+        def store(conn):
+            attempts = conn.execute("SELECT attempts FROM jobs WHERE id = ?",
+                                    (job["id"],)).fetchone()[0]
+            final = outcome in FINAL_OUTCOMES or attempts >= max_attempts
+            conn.execute(
+                "UPDATE jobs SET status = ?, outcome = ?, error = ?, finished_at = ?, "
+                "lease_token = NULL WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                ("failed" if final else "pending", outcome, error,
+                 time.time() if final else None, job["id"], job["token"]))
+        self._transaction(store)
+
+
+# ---------- Worker Loop ----------
+def run_worker(db_path, worker_id=None, batch=2, lease_seconds=LEASE_SECONDS,
+               max_attempts=MAX_ATTEMPTS, scan_step=5, color_tol=30, metrics=None,
+               poll_seconds=2.0, exit_when_idle=True):
+    """
+    Claims and measures jobs until the queue is drained (or forever with
+    exit_when_idle=False). A background thread heartbeats the held leases
+    every lease_seconds / 3. Returns the number of results this worker
+    stored.
+    """
+    import cv2
+    from MeasurementCalculator import measure_card_image, error_outcome, UnreadableImageError
+
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    if metrics is None:
+        metrics = GradingMetrics(run_name=worker_id, hooks=[print_event])
+    queue = WorkQueue(db_path)
+    held = []
+    held_lock = threading.Lock()
+    stop = threading.Event()
+
+    def heartbeat_loop():
+        while not stop.wait(lease_seconds / 3):
+            with held_lock:
+                jobs = list(held)
+            for job_id in queue.heartbeat(jobs, lease_seconds):
+                print(f"{worker_id}: lease on job {job_id} was reclaimed")
+
+    beat = threading.Thread(target=heartbeat_loop, daemon=True)
+    beat.start()
+    stored = 0
+    try:
+        while True:
+            jobs = queue.claim(worker_id, batch, lease_seconds, max_attempts)
+            if not jobs:
+                counts = queue.progress()
+                if exit_when_idle and not counts["pending"] and not counts["leased"] \
+                        and not counts["expired"]:
+                    break
+                time.sleep(poll_seconds)   # others still working; their leases may expire
+                continue
+            with held_lock:
+                held[:] = jobs
+            for job in jobs:
+                start = time.perf_counter()
+                try:
+                    image = cv2.imread(job["path"])
+                    if image is None:
+                        raise UnreadableImageError(f"Could not read image at {job['path']}")
+                    measurement = measure_card_image(image, scan_step=scan_step,
+                                                     color_tol=color_tol, metrics=metrics)
+                except Exception as e:
+                    outcome = error_outcome(e)
+                    queue.fail(job, outcome, str(e), max_attempts)
+                    metrics.record(job["path"], outcome, error=str(e),
+                                   seconds=time.perf_counter() - start,
+                                   traceback=traceback.format_exc() if outcome == ERROR else None)
+                else:
+                    stored += queue.complete(job, measurement)
+                    metrics.record(job["path"], SUCCESS, seconds=time.perf_counter() - start)
+                with held_lock:
+                    held.remove(job)
+    finally:
+        stop.set()
+        beat.join()
+        queue.close()
+    return stored
+
+
+# ---------- Local Run ----------
+def _worker_main(db_path, worker_id, kwargs):
+    from Scheduler import apply_thread_limits
+    apply_thread_limits(1)   # one core per local worker process
+    run_worker(db_path, worker_id, **kwargs)
+
+
+def run_local(db_path, folder_path, output_csv_path=None, workers=None, **kwargs):
+    """
+    Coordinator plus `workers` local worker processes on one box: enqueues
+    the folder, runs the workers to completion and optionally exports the
+    CSV. Returns the final progress counts.
+    """
+    from MeasurementCalculator import collect_image_files
+    from Scheduler import available_cores
+
+    workers = workers or available_cores()
+    with WorkQueue(db_path) as queue:
+        added = queue.enqueue(collect_image_files(os.path.abspath(folder_path)))
+        print(f"Enqueued {added} new jobs; starting {workers} local worker(s).")
+
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=_worker_main, args=(db_path, f"local-{i}", kwargs))
+             for i in range(workers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    with WorkQueue(db_path) as queue:
+        if output_csv_path:
+            print(f"Exported {queue.export_csv(output_csv_path)} rows to {output_csv_path}.")
+        return queue.progress()
+
+
+if __name__ == "__main__":
+    import sys
+    usage = ("Usage: python WorkQueue.py enqueue <db> <folder>\n"
+             "       python WorkQueue.py work <db>\n"
+             "       python WorkQueue.py status <db>\n"
+             "       python WorkQueue.py export <db> <csv>\n"
+             "       python WorkQueue.py local <db> <folder> [csv] [workers]")
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(1)
+    command, db = sys.argv[1], sys.argv[2]
+    if command == "enqueue":
+        from MeasurementCalculator import collect_image_files
+        with WorkQueue(db) as q:
+            print(f"Enqueued {q.enqueue(collect_image_files(os.path.abspath(sys.argv[3])))} new jobs.")
+    elif command == "work":
+        print(f"Stored {run_worker(db)} results.")
+    elif command == "status":
+        with WorkQueue(db) as q:
+            print(q.progress())
+    elif command == "export":
+        with WorkQueue(db) as q:
+            print(f"Exported {q.export_csv(sys.argv[3])} rows.")
+    elif command == "local":
+        csv_out = sys.argv[4] if len(sys.argv) > 4 else None
+        n = int(sys.argv[5]) if len(sys.argv) > 5 else None
+        print(run_local(db, sys.argv[3], csv_out, n))
+    else:
+        print(usage)
+        sys.exit(1)
@@ -0,0 +1,50 @@
+import os
+
+import cv2
+import pytest
+
+from CascadeGrader import grade_cascade, _measure, LOW_RES_FLAG, MIN_LOW_RES_WARP_PX
+from MeasurementCalculator import collect_image_files
+from Scikit_Learn_Model import predict_grades_with_spread
+
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "referenceImages")
+REFERENCE_IMAGES = collect_image_files(REFERENCE_DIR)
+
+
+@pytest.fixture(scope="module")
+def cascade():
+    return grade_cascade(REFERENCE_IMAGES)
+
+
+def test_pass1_grades_match_full_resolution():
+    # Only images whose low-res warp pass 1 accepts; the rest never get a pass-1 grade
+    accepted = []
+    for path in REFERENCE_IMAGES:
+        low = _measure(path, LOW_RES_FLAG, 5, 30, MIN_LOW_RES_WARP_PX)
+        if low is not None:
+            accepted.append((path, low, _measure(path, cv2.IMREAD_COLOR, 5, 30)))
+    assert accepted
+
+    low_grades, _ = predict_grades_with_spread([low for _, low, _ in accepted])
+    full_grades, _ = predict_grades_with_spread([full for _, _, full in accepted])
+    for (path, _, _), low, full in zip(accepted, low_grades, full_grades):
+        assert abs(low - full) <= 0.5, (path, low, full)
+
+
+def test_small_images_skip_pass1(cascade):
+    results, report = cascade
+    for r in results:
+        assert "error" not in r, r
+        if _measure(r["path"], LOW_RES_FLAG, 5, 30, MIN_LOW_RES_WARP_PX) is None:
+            assert r["escalated"], r
+    assert report["skipped_low_res"] == 11
+
+
+def test_report_always_has_gain(cascade):
+    _, report = cascade
+    assert report["throughput_gain"] > 0
+    assert report["model_load_seconds"] >= 0
+    # The 12 MP scan is graded at low resolution, so nothing escalates
+    _, report = grade_cascade([os.path.join(REFERENCE_DIR, "DarkBackgroundReferenceImage.jpg")])
+    assert report["escalated"] == 0
+    assert report["throughput_gain"] > 0
@@ -0,0 +1,15 @@
+import os
+
+from HyperparameterSearch import search
+from ModelUpdater import load_training_data
+
+TRAINING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trainingData.txt")
+
+
+def test_winner_is_scored_on_every_fold():
+    _, X, y = load_training_data(TRAINING_FILE)
+    # The first rung halves two candidates to one, long before fold 5
+    candidates = [{"n_estimators": 10, "max_depth": depth} for depth in (None, 2)]
+    board = search(X, y, candidates, n_splits=5, eta=2, n_jobs=1, verbose=False)
+    assert board[0]["folds"] == 5
+    assert board[1]["folds"] == 1
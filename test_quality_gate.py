@@ -0,0 +1,22 @@
+import os
+
+import cv2
+import pytest
+
+from MeasurementCalculator import collect_image_files
+from QualityGate import assess_image_quality, CARD_CROPPED
+
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "referenceImages")
+REFERENCE_IMAGES = collect_image_files(REFERENCE_DIR)
+
+
+@pytest.mark.parametrize("path", REFERENCE_IMAGES, ids=os.path.basename)
+def test_reference_images_pass(path):
+    report = assess_image_quality(path)
+    assert report["ok"], report
+
+
+def test_card_running_off_the_frame_is_cropped():
+    image = cv2.imread(os.path.join(REFERENCE_DIR, "DarkBackgroundReferenceImage.jpg"))
+    report = assess_image_quality(image[:, 600:])
+    assert CARD_CROPPED in report["reasons"]